@@ -0,0 +1,65 @@
+"""分块读取基准：比较 PNG 编解码与直接像素缓冲两种传输方式的每秒分块数
+
+用法:
+    python benchmark_tiles.py [图像路径] [--tile 512] [--count 200]
+不指定图像时生成一张 8192x8192 的 RGB 测试图。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ['PATH'] += os.pathsep + os.path.abspath('vips/bin')
+import pyvips
+from PySide6.QtGui import QImage
+
+from image_cache import vips_handles, vips_to_qimage
+
+
+def _png_round_trip(tile: pyvips.Image) -> QImage:
+    """旧实现：PNG 编码后再由 Qt 解码"""
+    return QImage.fromData(tile.write_to_buffer(".png"))
+
+
+def _run(file_path: str, tile_size: int, count: int, convert) -> float:
+    img = vips_handles.get(file_path)
+    cols = max(1, img.width // tile_size)
+    rows = max(1, img.height // tile_size)
+    start = time.perf_counter()
+    for i in range(count):
+        x = (i % cols) * tile_size
+        y = (i // cols % rows) * tile_size
+        tile = img.crop(x, y, min(tile_size, img.width - x), min(tile_size, img.height - y))
+        if convert(tile).isNull():
+            raise RuntimeError("tile conversion failed")
+    return count / (time.perf_counter() - start)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", help="测试图像，缺省时自动生成")
+    parser.add_argument("--tile", type=int, default=512, help="分块边长")
+    parser.add_argument("--count", type=int, default=200, help="读取的分块数")
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), "InfiniteSight_bench.tif")
+        if not os.path.exists(path):
+            xyz = pyvips.Image.xyz(8192, 8192)
+            rgb = (xyz[0] ^ xyz[1]).bandjoin([xyz[0], xyz[1]]).cast("uchar")
+            rgb.write_to_file(path, tile=True, compression="none")
+
+    before = _run(path, args.tile, args.count, _png_round_trip)
+    after = _run(path, args.tile, args.count, vips_to_qimage)
+    print(f"{os.path.basename(path)}  tile={args.tile}  count={args.count}")
+    print(f"  PNG round-trip : {before:8.1f} tiles/s")
+    print(f"  raw buffer     : {after:8.1f} tiles/s  ({after / before:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
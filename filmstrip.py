@@ -0,0 +1,214 @@
+"""文件夹缩略图条：虚拟化的模型/视图，只为可见单元格生成缩略图"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Optional
+
+from PySide6.QtCore import (QAbstractListModel, QModelIndex, QObject, QRunnable, QSize,
+                            QThreadPool, Qt, Signal)
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QListView, QWidget
+
+from folder_index import FolderIndex
+from image_cache import FILMSTRIP_THUMB_EDGE, load_thumbnail
+
+THUMB_EDGE = FILMSTRIP_THUMB_EDGE
+
+# 界面线程持有的缩略图上限（按条目计，约 THUMB_EDGE² × 4 字节一张）
+MAX_CACHED_THUMBS = 512
+
+# 排队请求上限：快速滚动时更早的请求早已移出视口，直接丢弃
+MAX_PENDING = 256
+
+# 缩略图生成线程池，与图像加载互不争抢
+thumbnail_pool = QThreadPool()
+thumbnail_pool.setMaxThreadCount(max(2, min(4, QThreadPool.globalInstance().maxThreadCount() // 2)))
+
+
+class _ThumbRequests:
+    """线程间共享的请求队列：纯 Python 对象，模型销毁后仍可安全访问
+
+    后进先出：最近请求的单元格就是当前可见的，优先生成。
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.queue: "deque[str]" = deque()
+        self.pending: set = set()           # 已排队或正在生成
+        self.workers = 0
+
+    def push(self, path: str) -> bool:
+        """加入队列，返回是否需要新启动一个工作任务"""
+        with self.lock:
+            if path in self.pending:
+                return False
+            self.pending.add(path)
+            self.queue.append(path)
+            while len(self.queue) > MAX_PENDING:
+                self.pending.discard(self.queue.popleft())
+            if self.workers < thumbnail_pool.maxThreadCount():
+                self.workers += 1
+                return True
+            return False
+
+    def pop(self) -> Optional[str]:
+        with self.lock:
+            if not self.queue:
+                self.workers -= 1
+                return None
+            return self.queue.pop()
+
+    def done(self, path: str) -> None:
+        with self.lock:
+            self.pending.discard(path)
+
+    def clear(self) -> None:
+        with self.lock:
+            for path in self.queue:
+                self.pending.discard(path)
+            self.queue.clear()
+
+
+class _ThumbSignals(QObject):
+    ready = Signal(str, object)   # (路径, QImage)
+
+
+class _ThumbWorker(QRunnable):
+    """从共享队列中持续取请求，直到队列为空"""
+
+    def __init__(self, requests: _ThumbRequests, signals: _ThumbSignals) -> None:
+        super().__init__()
+        self.requests = requests
+        self.signals = signals
+
+    def run(self) -> None:
+        while True:
+            path = self.requests.pop()
+            if path is None:
+                return
+            try:
+                # libvips shrink-on-load 生成，结果写入磁盘缩略图缓存
+                image = load_thumbnail(path, THUMB_EDGE)
+            except Exception:
+                image = QImage()
+            self.requests.done(path)
+            self.signals.ready.emit(path, image)
+
+
+class ThumbnailListModel(QAbstractListModel):
+    """以 FolderIndex 为数据源的列表模型
+
+    视图只会为可见行调用 data()，缩略图在此时才按需请求；
+    已生成的缩略图保存在按条目数限制的 LRU 中，滚动大目录时内存保持平稳。
+    """
+
+    def __init__(self, folder_index: FolderIndex, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.folder_index = folder_index
+        self._thumbs: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._failed: set = set()
+        self._placeholder = QPixmap(THUMB_EDGE, THUMB_EDGE)
+        self._placeholder.fill(Qt.GlobalColor.transparent)
+        self._requests = _ThumbRequests()
+        self._signals = _ThumbSignals()
+        self._signals.ready.connect(self._on_thumbnail_ready)
+        folder_index.changed.connect(self._on_folder_changed)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.folder_index.files)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or index.row() >= len(self.folder_index.files):
+            return None
+        path = self.folder_index.files[index.row()]
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self._thumbnail(path)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return os.path.basename(path)
+        if role == Qt.ItemDataRole.UserRole:
+            return path
+        return None
+
+    def cancel(self) -> None:
+        """撤下排队中的请求，正在生成的完成后照常送达"""
+        self._requests.clear()
+
+    def shutdown(self, timeout_ms: int = 2000) -> None:
+        """退出程序时调用：撤下排队请求并等待正在生成的缩略图，避免向已销毁的对象发信号"""
+        self.cancel()
+        thumbnail_pool.waitForDone(timeout_ms)
+
+    def thumbnail_bytes(self) -> int:
+        return sum(pm.width() * pm.height() * pm.depth() // 8 for pm in self._thumbs.values())
+
+    def trim_thumbnails(self, max_bytes: int) -> None:
+        """内存紧张时丢弃最久未显示的缩略图，重新可见时再从磁盘缓存读取"""
+        total = self.thumbnail_bytes()
+        while self._thumbs and total > max_bytes:
+            _, pm = self._thumbs.popitem(last=False)
+            total -= pm.width() * pm.height() * pm.depth() // 8
+
+    def _thumbnail(self, path: str) -> QPixmap:
+        pixmap = self._thumbs.get(path)
+        if pixmap is not None:
+            self._thumbs.move_to_end(path)
+            return pixmap
+        if path not in self._failed and self._requests.push(path):
+            thumbnail_pool.start(_ThumbWorker(self._requests, self._signals))
+        return self._placeholder
+
+    def _on_thumbnail_ready(self, path: str, image: QImage) -> None:
+        if image.isNull():
+            self._failed.add(path)
+            return
+        self._thumbs[path] = QPixmap.fromImage(image)
+        self._thumbs.move_to_end(path)
+        while len(self._thumbs) > MAX_CACHED_THUMBS:
+            self._thumbs.popitem(last=False)
+        row = self.folder_index.index_of(path)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def _on_folder_changed(self) -> None:
+        # 旧目录的排队请求不再可见
+        self._requests.clear()
+        self._failed.clear()
+        self.beginResetModel()
+        self.endResetModel()
+
+
+class FilmstripView(QListView):
+    """图标模式的缩略图条/网格，统一单元格尺寸，布局不需要逐项测量"""
+
+    image_activated = Signal(str)
+
+    def __init__(self, model: ThumbnailListModel, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setIconSize(QSize(THUMB_EDGE, THUMB_EDGE))
+        self.setGridSize(QSize(THUMB_EDGE + 12, THUMB_EDGE + 12))
+        self.setSelectionMode(QListView.SelectionMode.SingleSelection)
+        self.setModel(model)
+        self.clicked.connect(self._on_clicked)
+
+    def set_current_row(self, row: int) -> None:
+        """跟随当前图像高亮并滚动到可见处（不触发打开）"""
+        if row < 0 or row >= self.model().rowCount():
+            self.clearSelection()
+            return
+        index = self.model().index(row)
+        self.setCurrentIndex(index)
+        self.scrollTo(index)
+
+    def _on_clicked(self, index: QModelIndex) -> None:
+        path = index.data(Qt.ItemDataRole.UserRole)
+        if path:
+            self.image_activated.emit(path)
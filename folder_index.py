@@ -0,0 +1,153 @@
+"""同级目录图片索引：后台 scandir 建立一次，之后由 QFileSystemWatcher 增量维护"""
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+from typing import List, Optional
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+from image_core import is_image_file, path_key
+from loader_pool import PRIORITY_METADATA, LoaderPool
+
+# 目录变化通知往往成串到达，合并后再重新扫描
+RESCAN_DELAY = 300
+
+
+def scan_folder(folder: str) -> List[str]:
+    """一次 scandir 列出目录中的图片；DirEntry.is_file 通常不需要额外 stat"""
+    files = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if is_image_file(entry.name):
+                try:
+                    if entry.is_file():
+                        files.append(os.path.join(folder, entry.name))
+                except OSError:
+                    continue
+    return files
+
+
+class FolderIndex(QObject):
+    """当前目录的有序图片列表，漫游、状态栏和拖放共用
+
+    切换目录时在加载线程池中扫描，完成前 files 为空、界面照常显示当前图像；
+    目录内容变化时重新列出文件名，与现有列表求差后按序插入/删除，不整体重排。
+    """
+
+    changed = Signal()
+    _scanned = Signal(object, str, int)   # (文件列表, 目录, 代号)
+
+    def __init__(self, pool: LoaderPool, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.pool = pool
+        self.folder: Optional[str] = None
+        self.files: List[str] = []
+        self.ready = False
+        self._keys: List[str] = []          # 与 files 对应的排序键
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._job_id: Optional[str] = None
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._rescan_timer = QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(RESCAN_DELAY)
+        self._rescan_timer.timeout.connect(self._rescan)
+        self._scanned.connect(self._on_scanned)
+
+    @staticmethod
+    def _sort_key(path: str) -> str:
+        return path.lower()
+
+    def set_folder(self, folder: str) -> None:
+        """切换到 folder；与当前目录相同时直接复用已有索引"""
+        folder = os.path.abspath(folder)
+        if folder == self.folder:
+            return
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self.folder = folder
+        self.files = []
+        self._keys = []
+        self.ready = False
+        if os.path.isdir(folder):
+            self._watcher.addPath(folder)
+            self._rescan()
+        self.changed.emit()
+
+    def index_of(self, path: str) -> int:
+        """二分查找 path 在列表中的位置，不存在时返回 -1
+
+        列表中的路径由 scandir 拼出，分隔符与文件对话框、拖放给出的路径可能不同，按 path_key 比对。
+        """
+        path = os.path.abspath(path)
+        key = self._sort_key(path)
+        target = path_key(path)
+        i = bisect.bisect_left(self._keys, key)
+        # 仅大小写不同的文件名排序键相同，逐个比对
+        while i < len(self.files) and self._keys[i] == key:
+            if path_key(self.files[i]) == target:
+                return i
+            i += 1
+        return -1
+
+    def cancel(self) -> None:
+        self._rescan_timer.stop()
+        with self._lock:
+            self._generation += 1
+        self.pool.cancel(self._job_id)
+
+    def _on_directory_changed(self, folder: str) -> None:
+        if folder == self.folder:
+            self._rescan_timer.start()
+
+    def _rescan(self) -> None:
+        self.cancel()
+        with self._lock:
+            generation = self._generation
+        folder = self.folder
+        self._job_id = self.pool.submit(lambda: self._scan(folder, generation), PRIORITY_METADATA)
+
+    def _scan(self, folder: str, generation: int) -> None:
+        """在线程池中执行"""
+        try:
+            files = scan_folder(folder)
+        except OSError:
+            files = []
+        with self._lock:
+            if generation != self._generation:
+                return
+        self._scanned.emit(files, folder, generation)
+
+    def _on_scanned(self, files: List[str], folder: str, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation or folder != self.folder:
+                return
+
+        if not self.ready:
+            self.files = sorted(files, key=self._sort_key)
+            self._keys = [self._sort_key(f) for f in self.files]
+            self.ready = True
+            self.changed.emit()
+            return
+
+        current = set(self.files)
+        latest = set(files)
+        removed = current - latest
+        added = latest - current
+        if not removed and not added:
+            return
+        for path in removed:
+            i = self.index_of(path)
+            if i >= 0:
+                del self.files[i]
+                del self._keys[i]
+        for path in added:
+            key = self._sort_key(path)
+            i = bisect.bisect_right(self._keys, key)
+            self.files.insert(i, path)
+            self._keys.insert(i, key)
+        self.changed.emit()
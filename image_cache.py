@@ -1,31 +1,76 @@
-"""图像缓存与分块读取工具（基于 libvips）"""
+"""image_core 的 Qt 适配层：把像素缓冲包装为 QImage
+
+缓存、句柄池等仍从这里导出，界面代码只需依赖本模块。
+QImage 可在加载线程中创建；QPixmap 只在界面线程由调用方创建。
+"""
 from __future__ import annotations
 
-import os
+from typing import Optional, Tuple
 
-from PySide6.QtCore import QDir
-from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtGui import QImage
 import pyvips
 
-CACHE_DIR = os.path.join(QDir.tempPath(), "InfiniteSight_cache")
-os.makedirs(CACHE_DIR, exist_ok=True)
+import image_core
+from image_core import (DISPLAY_THUMB_EDGE, FILMSTRIP_THUMB_EDGE, STRATEGY_FULL, STRATEGY_REJECT,
+                        STRATEGY_TILED, CancelCallback, Cancelled, PixelBuffer, ProgressCallback,
+                        decode_strategy, get_thumbnail_cache, has_thumbnail, image_size,
+                        is_large, is_very_large, path_key, probe, set_decode_budget, vips_handles)
+
+# 8 位图像按通道数对应的最紧凑的 QImage 格式（RGBA 为非预乘，与 libvips 一致）
+_QIMAGE_FORMATS = {
+    1: QImage.Format.Format_Grayscale8,
+    3: QImage.Format.Format_RGB888,
+    4: QImage.Format.Format_RGBA8888,
+}
+
+
+def to_qimage(buf: Optional[PixelBuffer]) -> QImage:
+    """直接用像素缓冲构造 QImage，不经过编解码；QImage 持有该缓冲的引用
+
+    在加载线程中调用：不透明的 RGBA 在这里转为 RGB，界面线程不再做格式转换。
+    """
+    if buf is None:
+        return QImage()
+    buf = image_core.drop_opaque_alpha(buf)
+    return QImage(buf.data, buf.width, buf.height, buf.stride, _QIMAGE_FORMATS[buf.bands])
+
+
+def vips_to_qimage(img: pyvips.Image) -> QImage:
+    """把 libvips 图像转换为 QImage"""
+    return to_qimage(image_core.to_pixel_buffer(img))
+
+
+def decode_qimage(file_path: str, progress: Optional[ProgressCallback] = None,
+                  is_cancelled: Optional[CancelCallback] = None) -> QImage:
+    """完整解码一张图像"""
+    return to_qimage(image_core.decode(file_path, progress, is_cancelled))
 
 
-def is_very_large(file_path: str, threshold_bytes: int = 256 << 20) -> bool:
-    """文件大小是否超过阈值"""
-    return os.path.getsize(file_path) > threshold_bytes
+def load_thumbnail(file_path: str, max_edge: int = DISPLAY_THUMB_EDGE,
+                   progress: Optional[ProgressCallback] = None,
+                   is_cancelled: Optional[CancelCallback] = None) -> QImage:
+    """生成或读取缓存缩略图（返回 QImage，可在加载线程中安全使用）"""
+    return to_qimage(image_core.thumbnail(file_path, max_edge, progress, is_cancelled))
 
 
-def load_thumbnail(file_path: str, max_edge: int = 4096) -> QPixmap:
-    """生成或读取缓存缩略图"""
-    cache_key = f"{abs(hash(file_path))}_{max_edge}.jpg"
-    cache_file = os.path.join(CACHE_DIR, cache_key)
+def load_preview(file_path: str, max_edge: int = 1024) -> Optional[Tuple[QImage, int, int]]:
+    """快速预览，返回 (预览图, 原图宽, 原图高)；格式不适合时返回 None"""
+    result = image_core.preview(file_path, max_edge)
+    if result is None:
+        return None
+    buf, width, height = result
+    return to_qimage(buf), width, height
 
-    if not os.path.exists(cache_file):
-        img = pyvips.Image.thumbnail(file_path, max_edge)
-        img.write_to_file(cache_file)
 
-    return QPixmap(cache_file)
+def load_fit(file_path: str, width: int, height: int,
+             progress: Optional[ProgressCallback] = None,
+             is_cancelled: Optional[CancelCallback] = None) -> Optional[Tuple[QImage, int, int]]:
+    """按视口大小解码，返回 (缩小图, 原图宽, 原图高)；不需要缩小时返回 None"""
+    result = image_core.fit(file_path, width, height, progress, is_cancelled)
+    if result is None:
+        return None
+    buf, full_width, full_height = result
+    return to_qimage(buf), full_width, full_height
 
 
 def load_tile(
@@ -34,9 +79,8 @@ def load_tile(
     y: int = 0,
     w: int = 2048,
     h: int = 2048,
-) -> QPixmap:
-    """读取图像指定区域"""
-    img = pyvips.Image.new_from_file(file_path)
-    tile = img.crop(x, y, w, h)
-    buf = tile.write_to_buffer(".png")
-    return QPixmap.fromImage(QImage.fromData(buf))
\ No newline at end of file
+    level: int = 0,
+    is_cancelled: Optional[CancelCallback] = None,
+) -> QImage:
+    """读取图像指定区域，level 为金字塔层级"""
+    return to_qimage(image_core.tile(file_path, x, y, w, h, level, is_cancelled))
@@ -0,0 +1,834 @@
+"""不依赖 Qt 的图像核心：解码、缩略图、分块读取与元数据（基于 libvips / PIL）
+
+所有函数返回 PixelBuffer（紧密排列的 8 位像素与尺寸），可在任意线程或子进程中调用，
+也可直接用于无界面的工具和基准测试；转换为 QImage 由 image_cache 中的 Qt 适配层完成。
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import itertools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from PIL import Image
+from PIL.ExifTags import IFD, TAGS, GPSTAGS
+import pyvips
+
+# 与 Qt 的 QDir.tempPath() 取同一个系统临时目录；旧版每张一个 JPEG 的缓存文件在创建数据库时清理
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "InfiniteSight_cache")
+
+# 查看器请求的缩略图尺寸：超大图像的显示图、缩略图条；缓存预热按同样的键生成
+DISPLAY_THUMB_EDGE = 4096
+FILMSTRIP_THUMB_EDGE = 128
+
+# 支持的扩展名
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff', '.tif', '.webp'}
+
+
+def is_image_file(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+# 解码策略：预算内完整解码（大图先按视口 shrink-on-load）；超出预算时显示 libvips
+# shrink-on-load 生成的缩略图，放大后按需读取分块；只能由 PIL 整张解码的超预算文件拒绝解码。
+# PIL 的解压炸弹检查保持默认开启：超出其像素上限的文件只能经 libvips 读取，否则同样拒绝
+STRATEGY_FULL = "full"
+STRATEGY_TILED = "tiled"
+STRATEGY_REJECT = "reject"
+
+# 完整解码允许占用的内存（字节），查看器按设置调整
+DEFAULT_DECODE_BUDGET = 1 << 30
+_decode_budget = DEFAULT_DECODE_BUDGET
+
+_VIPS_FORMAT_BITS = {"uchar": 8, "char": 8, "ushort": 16, "short": 16}
+_PIL_MODE_BITS = {"I;16": 16, "I;16B": 16, "I;16L": 16, "I": 32, "F": 32}
+
+
+def set_decode_budget(max_bytes: int) -> None:
+    global _decode_budget
+    _decode_budget = max_bytes
+
+
+class ImageProbe:
+    """只读文件头得到的图像信息；宽高与通道数对应 decode() 的输出"""
+
+    __slots__ = ("width", "height", "bands", "bits", "loader")
+
+    def __init__(self, width: int, height: int, bands: int, bits: int, loader: Optional[str]) -> None:
+        self.width = width
+        self.height = height
+        self.bands = bands
+        self.bits = bits          # 文件中每个样本的位深
+        self.loader = loader      # libvips 加载器名，只能由 PIL 读取时为 None
+
+    @property
+    def decoded_bytes(self) -> int:
+        """完整解码所需的内存：界面直接绘制 8 位像素缓冲，不另存 32 位副本
+
+        缩小显示用的 mipmap 由全局内存预算另行计入和回收。
+        """
+        return self.width * self.height * self.bands
+
+
+@functools.lru_cache(maxsize=512)
+def _probe(file_path: str, size: int, mtime_ns: int) -> ImageProbe:
+    try:
+        header = pyvips.Image.new_from_file(file_path)
+        img = normalize_vips(header)
+        return ImageProbe(img.width, img.height, img.bands,
+                          _VIPS_FORMAT_BITS.get(header.format, 32), header.get("vips-loader"))
+    except pyvips.Error:
+        with Image.open(file_path) as img:
+            return ImageProbe(img.width, img.height, len(_pil_output_mode(img)),
+                              _PIL_MODE_BITS.get(img.mode, 8), None)
+
+
+def probe(file_path: str) -> ImageProbe:
+    """读取文件头（不解码像素），结果按路径、大小和修改时间缓存"""
+    st = os.stat(file_path)
+    return _probe(os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+
+
+def decode_strategy(file_path: str) -> str:
+    """按估算的解码内存与预算选择解码方式"""
+    try:
+        info = probe(file_path)
+    except Image.DecompressionBombError:
+        # libvips 读不了、PIL 又拒绝打开：无法在不冒内存风险的前提下解码
+        return STRATEGY_REJECT
+    if info.decoded_bytes <= _decode_budget:
+        return STRATEGY_FULL
+    return STRATEGY_TILED if info.loader is not None else STRATEGY_REJECT
+
+
+def is_very_large(file_path: str) -> bool:
+    """是否超出解码预算、改用缩略图加分块显示"""
+    return decode_strategy(file_path) == STRATEGY_TILED
+
+
+# 延迟加载模式下，完整解码超过该字节数的图像与超出预算的图像一样推迟解码
+LAZY_DECODE_BYTES = 256 << 20
+
+
+def is_large(file_path: str) -> bool:
+    """延迟加载模式下是否推迟解码：打开时只读文件头和廉价预览，放大后再解码"""
+    strategy = decode_strategy(file_path)
+    if strategy == STRATEGY_TILED:
+        return True
+    return strategy == STRATEGY_FULL and probe(file_path).decoded_bytes > LAZY_DECODE_BYTES
+
+
+def path_key(file_path: str) -> str:
+    """比较路径、作为字典键用的规范写法：绝对路径，Windows 下统一分隔符并忽略大小写"""
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def cache_key(file_path: str, *parts: object) -> str:
+    """由 路径 + 文件大小 + 修改时间 生成跨进程稳定的缓存键"""
+    st = os.stat(file_path)
+    raw = "|".join(
+        [path_key(file_path), str(st.st_size), str(st.st_mtime_ns)]
+        + [str(p) for p in parts]
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# 进度回调接收 0-100 的百分比；取消回调返回 True 时中止计算
+ProgressCallback = Callable[[int], None]
+CancelCallback = Callable[[], bool]
+
+
+class Cancelled(Exception):
+    """计算途中任务已作废，libvips 已停止计算"""
+
+
+class PixelBuffer:
+    """解码结果：紧密排列的 8 位像素（1 灰度 / 3 RGB / 4 非预乘 RGBA 通道）及尺寸"""
+
+    __slots__ = ("data", "width", "height", "bands")
+
+    def __init__(self, data: bytes, width: int, height: int, bands: int) -> None:
+        self.data = data
+        self.width = width
+        self.height = height
+        self.bands = bands
+
+    @property
+    def stride(self) -> int:
+        return self.width * self.bands
+
+    @property
+    def nbytes(self) -> int:
+        return self.stride * self.height
+
+
+class ThumbnailCache:
+    """打包在单个 SQLite 数据库中的磁盘缩略图缓存，按总字节数做 LRU 淘汰
+
+    缩略图存为 JPEG（带 alpha 的存 PNG）；压缩收益不大时存原始像素，读取时无需解码。
+    每条记录带 CRC32 校验，损坏的记录读取时丢弃；数据库本身损坏时整个重建。
+    WAL 模式下多个进程可同时读写（缓存预热工具的子进程直接写入）。
+    """
+
+    DB_NAME = "thumbnails.db"
+    # 原始像素不超过编码结果的这么多倍时直接存原始像素
+    RAW_MAX_RATIO = 2
+    JPEG_QUALITY = 85
+    # 空闲页超过该比例时压缩数据库
+    COMPACT_RATIO = 0.25
+
+    def __init__(self, cache_dir: str, max_bytes: int = 100 << 20) -> None:
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, self.DB_NAME)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._total = 0
+        # 读取命中时只记下访问时间，flush 时批量写回，读取不产生写事务
+        self._touched: Dict[str, float] = {}
+
+    # ---------------- 数据库 ----------------
+    def _remove_legacy_files(self) -> None:
+        """清理旧版每张缩略图一个 JPEG 文件的缓存及其索引"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith((".jpg", ".tmp")) or name == "index.json":
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _db(self) -> sqlite3.Connection:
+        """调用方需持有锁；fork 出的子进程不能沿用父进程的连接，按进程重新打开"""
+        if self._conn is None or self._pid != os.getpid():
+            try:
+                self._conn = self._open()
+            except sqlite3.DatabaseError:
+                self._remove_db()
+                self._conn = self._open()
+            self._pid = os.getpid()
+            self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbs").fetchone()[0]
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        # 目录和数据库在第一次访问时才创建
+        if not os.path.exists(self.db_path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._remove_legacy_files()
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS thumbs ("
+            " key TEXT PRIMARY KEY, codec TEXT NOT NULL,"
+            " width INTEGER NOT NULL, height INTEGER NOT NULL, bands INTEGER NOT NULL,"
+            " data BLOB NOT NULL, crc INTEGER NOT NULL, size INTEGER NOT NULL, atime REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS thumbs_atime ON thumbs (atime)")
+        return conn
+
+    def _remove_db(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.db_path + suffix)
+            except OSError:
+                pass
+        self._touched.clear()
+        self._total = 0
+
+    def _reset_locked(self) -> None:
+        """数据库损坏：删除后重建，缓存内容可以重新生成"""
+        self._remove_db()
+        self._db()
+
+    # ---------------- 编码 ----------------
+    @classmethod
+    def _encode(cls, buf: PixelBuffer) -> Tuple[str, bytes]:
+        img = pyvips.Image.new_from_memory(buf.data, buf.width, buf.height, buf.bands, "uchar")
+        if buf.bands == 4:
+            codec, data = "png", img.pngsave_buffer(compression=1)
+        else:
+            codec, data = "jpeg", img.jpegsave_buffer(Q=cls.JPEG_QUALITY)
+        if buf.nbytes <= len(data) * cls.RAW_MAX_RATIO:
+            return "raw", bytes(buf.data)
+        return codec, data
+
+    @staticmethod
+    def _decode(codec: str, data: bytes, width: int, height: int, bands: int) -> PixelBuffer:
+        if codec == "raw":
+            return PixelBuffer(data, width, height, bands)
+        img = pyvips.Image.new_from_buffer(data, "", access="sequential")
+        return PixelBuffer(img.write_to_memory(), img.width, img.height, img.bands)
+
+    # ---------------- 读写 ----------------
+    def contains(self, key: str) -> bool:
+        """只查询是否已缓存，不刷新访问时间"""
+        with self._lock:
+            try:
+                return self._db().execute("SELECT 1 FROM thumbs WHERE key = ?", (key,)).fetchone() is not None
+            except sqlite3.DatabaseError:
+                self._reset_locked()
+                return False
+
+    def get(self, key: str) -> Optional[PixelBuffer]:
+        """命中且校验通过时返回像素，并记下访问时间"""
+        with self._lock:
+            try:
+                row = self._db().execute(
+                    "SELECT codec, width, height, bands, data, crc FROM thumbs WHERE key = ?", (key,)).fetchone()
+            except sqlite3.DatabaseError:
+                self._reset_locked()
+                return None
+            if row is None:
+                return None
+            codec, width, height, bands, data, crc = row
+            if zlib.crc32(data) != crc:
+                self._delete_locked(key)
+                return None
+            self._touched[key] = time.time()
+        try:
+            return self._decode(codec, data, width, height, bands)
+        except pyvips.Error:
+            with self._lock:
+                self._delete_locked(key)
+            return None
+
+    def put(self, key: str, buf: PixelBuffer) -> int:
+        """编码后写入，返回占用的字节数；编码在锁外进行，可在任意线程或其他进程中调用"""
+        codec, data = self._encode(buf)
+        with self._lock:
+            try:
+                conn = self._db()
+                old = conn.execute("SELECT size FROM thumbs WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO thumbs (key, codec, width, height, bands, data, crc, size, atime)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, codec, buf.width, buf.height, buf.bands, data, zlib.crc32(data), len(data), time.time()))
+            except sqlite3.DatabaseError:
+                self._reset_locked()
+                return 0
+            self._total += len(data) - (old[0] if old else 0)
+        return len(data)
+
+    def _delete_locked(self, key: str) -> None:
+        try:
+            conn = self._db()
+            row = conn.execute("SELECT size FROM thumbs WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM thumbs WHERE key = ?", (key,))
+                self._total -= row[0]
+        except sqlite3.DatabaseError:
+            self._reset_locked()
+        self._touched.pop(key, None)
+
+    def flush(self) -> None:
+        """把批量记录的访问时间写回数据库"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            conn = self._db()
+            conn.execute("BEGIN")
+            conn.executemany("UPDATE thumbs SET atime = ? WHERE key = ?",
+                             [(atime, key) for key, atime in touched.items()])
+            conn.execute("COMMIT")
+        except sqlite3.DatabaseError:
+            self._reset_locked()
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max(0, max_bytes)
+            self._evict_locked()
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        try:
+            conn = self._db()
+            if self._total <= self.max_bytes:
+                return
+            self._flush_locked()
+            # 其他进程可能也写入过，以数据库中的合计为准
+            self._total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbs").fetchone()[0]
+            while self._total > self.max_bytes:
+                rows = conn.execute("SELECT key, size FROM thumbs ORDER BY atime LIMIT 256").fetchall()
+                if not rows:
+                    break
+                conn.execute("BEGIN")
+                for key, size in rows:
+                    conn.execute("DELETE FROM thumbs WHERE key = ?", (key,))
+                    self._total -= size
+                    if self._total <= self.max_bytes:
+                        break
+                conn.execute("COMMIT")
+        except sqlite3.DatabaseError:
+            self._reset_locked()
+
+    def compact(self) -> None:
+        """淘汰留下的空闲页较多时压缩数据库文件
+
+        耗时与数据库大小成正比，应在后台线程调用。这里不做完整性检查：
+        打开或读写出错时整个重建，单条记录由 CRC 校验。
+        """
+        with self._lock:
+            self._flush_locked()
+            try:
+                conn = self._db()
+                pages = conn.execute("PRAGMA page_count").fetchone()[0]
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not pages or free <= pages * self.COMPACT_RATIO:
+                    return
+                conn.execute("VACUUM")
+                # WAL 模式下压缩结果写在日志里，检查点后主文件才会缩小
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.OperationalError:
+                # 其他进程正在写入，下次再压缩
+                pass
+            except sqlite3.DatabaseError:
+                self._reset_locked()
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._db()
+            return self._total
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """磁盘缩略图缓存，第一次调用时创建；只做解码的进程（如多进程解码的子进程）不会碰缓存目录"""
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache(CACHE_DIR)
+        return _thumbnail_cache
+
+
+def normalize_vips(img: pyvips.Image) -> pyvips.Image:
+    """转换为 8 位 sRGB 或灰度，通道数为 1/3/4"""
+    if img.interpretation == "b-w" and img.bands == 1 and img.format == "uchar":
+        return img
+    try:
+        if img.interpretation in ("b-w", "grey16") and img.bands == 1:
+            img = img.colourspace("b-w")
+        elif img.interpretation != "srgb" or img.format != "uchar" or img.bands == 2:
+            img = img.colourspace("srgb")
+    except pyvips.Error:
+        pass
+    if img.bands == 2:
+        img = img.extract_band(0)
+    elif img.bands > 4:
+        img = img.extract_band(0, n=3)
+    if img.format != "uchar":
+        img = img.cast("uchar")
+    return img
+
+
+_watch_serial = itertools.count(1)
+
+
+def watch(img: pyvips.Image, progress: Optional[ProgressCallback] = None,
+          is_cancelled: Optional[CancelCallback] = None) -> pyvips.Image:
+    """为即将计算的管线挂上进度与中止回调，libvips 每算完一批像素触发一次 eval"""
+    if progress is None and is_cancelled is None:
+        return img
+    # libvips 会复用参数相同的操作的输出图像；加一个参数唯一的 copy，
+    # 回调只挂在本次计算独有的图像上，不会残留到以后的计算中
+    img = img.copy(xoffset=next(_watch_serial))
+    img.set_progress(True)
+
+    def on_eval(image: pyvips.Image, p: Any) -> None:
+        if is_cancelled is not None and is_cancelled():
+            image.set_kill(True)
+        elif progress is not None:
+            progress(p.percent)
+
+    img.signal_connect("eval", on_eval)
+    return img
+
+
+@contextmanager
+def _killable(is_cancelled: Optional[CancelCallback]) -> Iterator[None]:
+    """把中止导致的 libvips 错误转换为 Cancelled"""
+    try:
+        yield
+    except pyvips.Error:
+        if is_cancelled is not None and is_cancelled():
+            raise Cancelled() from None
+        raise
+
+
+def to_pixel_buffer(img: pyvips.Image, progress: Optional[ProgressCallback] = None,
+                    is_cancelled: Optional[CancelCallback] = None) -> PixelBuffer:
+    """libvips 图像计算为内存中的像素缓冲"""
+    img = watch(normalize_vips(img), progress, is_cancelled)
+    with _killable(is_cancelled):
+        data = img.write_to_memory()
+    return PixelBuffer(data, img.width, img.height, img.bands)
+
+
+def drop_opaque_alpha(buf: PixelBuffer) -> PixelBuffer:
+    """alpha 通道处处不透明时去掉，RGBA 变为 RGB：省四分之一内存，绘制时也不必混合"""
+    if buf.bands != 4:
+        return buf
+    img = pyvips.Image.new_from_memory(buf.data, buf.width, buf.height, 4, "uchar")
+    if img.extract_band(3).min() < 255:
+        return buf
+    return PixelBuffer(img.extract_band(0, n=3).write_to_memory(), buf.width, buf.height, 3)
+
+
+def _pil_output_mode(img: Image.Image) -> str:
+    if img.mode in ("L", "RGB", "RGBA"):
+        return img.mode
+    has_alpha = "A" in img.getbands() or "transparency" in img.info
+    return "RGBA" if has_alpha else "RGB"
+
+
+def _decode_with_pil(file_path: str) -> PixelBuffer:
+    """libvips 不支持的格式（如未编译 ImageMagick 时的 BMP）由 PIL 解码，超出解码预算时拒绝"""
+    with Image.open(file_path) as img:
+        mode = _pil_output_mode(img)
+        if img.width * img.height * len(mode) > _decode_budget:
+            raise RuntimeError("Image exceeds the decode memory budget")
+        if mode != img.mode:
+            img = img.convert(mode)
+        else:
+            img.load()
+        return PixelBuffer(img.tobytes(), img.width, img.height, len(img.getbands()))
+
+
+def decode(file_path: str, progress: Optional[ProgressCallback] = None,
+           is_cancelled: Optional[CancelCallback] = None) -> PixelBuffer:
+    """完整解码一张图像；PIL 解码的格式不报告进度"""
+    try:
+        img = pyvips.Image.new_from_file(file_path, access="sequential")
+    except pyvips.Error:
+        return _decode_with_pil(file_path)
+    return to_pixel_buffer(img, progress, is_cancelled)
+
+
+def decoded_shape(file_path: str) -> Tuple[int, int, int]:
+    """只读文件头，返回 decode() 结果的 (宽, 高, 通道数)"""
+    info = probe(file_path)
+    return info.width, info.height, info.bands
+
+
+def thumbnail_key(file_path: str, max_edge: int) -> str:
+    """缩略图的缓存键；"raw" 表示未做 EXIF 方向旋转，旧版自动旋转的缓存条目不再命中"""
+    return cache_key(file_path, max_edge, "raw")
+
+
+def has_thumbnail(file_path: str, max_edge: int = DISPLAY_THUMB_EDGE) -> bool:
+    """缩略图是否已在磁盘缓存中（不生成）"""
+    return get_thumbnail_cache().contains(thumbnail_key(file_path, max_edge))
+
+
+def make_thumbnail(file_path: str, max_edge: int,
+                   progress: Optional[ProgressCallback] = None,
+                   is_cancelled: Optional[CancelCallback] = None) -> PixelBuffer:
+    """生成缩略图（不经过缓存）
+
+    不做 EXIF 方向旋转，与完整解码、分块和 image_size() 的像素方向一致：
+    超大图像的分块直接叠在显示用缩略图上，方向由查看器的视图变换统一处理。
+    """
+    try:
+        img = pyvips.Image.thumbnail(file_path, max_edge, no_rotate=True)
+    except pyvips.Error:
+        return _thumbnail_with_pil(file_path, max_edge)
+    return to_pixel_buffer(img, progress, is_cancelled)
+
+
+def _thumbnail_with_pil(file_path: str, max_edge: int) -> PixelBuffer:
+    """libvips 不支持的格式由 PIL 生成缩略图；能 draft 的格式在解码时缩小，其余整张解码，超出解码预算时拒绝"""
+    with Image.open(file_path) as img:
+        mode = _pil_output_mode(img)
+        img.draft(mode, (max_edge, max_edge))
+        if img.width * img.height * len(mode) > _decode_budget:
+            raise RuntimeError("Image exceeds the decode memory budget")
+        if mode != img.mode:
+            img = img.convert(mode)
+        img.thumbnail((max_edge, max_edge))
+        return PixelBuffer(img.tobytes(), img.width, img.height, len(img.getbands()))
+
+
+def thumbnail(file_path: str, max_edge: int = DISPLAY_THUMB_EDGE,
+              progress: Optional[ProgressCallback] = None,
+              is_cancelled: Optional[CancelCallback] = None) -> PixelBuffer:
+    """生成或读取缓存缩略图；进度与中止只作用于生成阶段"""
+    key = thumbnail_key(file_path, max_edge)
+    cache = get_thumbnail_cache()
+    buf = cache.get(key)
+    if buf is not None:
+        return buf
+
+    buf = make_thumbnail(file_path, max_edge, progress, is_cancelled)
+    cache.put(key, buf)
+    # 写入后再淘汰，cache_size 为 0 时也能拿到本次结果
+    cache.evict()
+    return buf
+
+
+# 支持解码时直接缩小（shrink-on-load）的 libvips 加载器
+_SHRINK_ON_LOAD_LOADERS = {"jpegload", "webpload"}
+
+
+def preview(file_path: str, max_edge: int = 1024) -> Optional[Tuple[PixelBuffer, int, int]]:
+    """用 shrink-on-load 快速生成预览，返回 (预览图, 原图宽, 原图高)
+
+    只对能在解码阶段缩小的格式生成；其他格式生成预览并不比完整解码快，返回 None。
+    """
+    header = pyvips.Image.new_from_file(file_path)
+    width, height = header.width, header.height
+    if header.get("vips-loader") not in _SHRINK_ON_LOAD_LOADERS or max(width, height) <= max_edge * 2:
+        return None
+    img = pyvips.Image.thumbnail(file_path, max_edge, size="down", no_rotate=True)
+    return to_pixel_buffer(img), width, height
+
+
+# 原图至少比视口大这么多倍时才按视口解码，否则直接完整解码
+MIN_FIT_SHRINK = 1.5
+
+
+def fit(file_path: str, width: int, height: int,
+        progress: Optional[ProgressCallback] = None,
+        is_cancelled: Optional[CancelCallback] = None) -> Optional[Tuple[PixelBuffer, int, int]]:
+    """按视口大小解码，返回 (缩小图, 原图宽, 原图高)；原图不比视口大多少时返回 None
+
+    JPEG 在 DCT 阶段、WebP 等在解码阶段直接缩小，内存占用只与视口大小相关。
+    不做 EXIF 方向旋转，与完整解码的像素方向一致，以便之后原地替换。
+    """
+    header = pyvips.Image.new_from_file(file_path)
+    full_width, full_height = header.width, header.height
+    if max(full_width / width, full_height / height) < MIN_FIT_SHRINK:
+        return None
+    img = pyvips.Image.thumbnail(file_path, width, height=height, size="down", no_rotate=True)
+    return to_pixel_buffer(img, progress, is_cancelled), full_width, full_height
+
+
+class VipsHandlePool:
+    """按路径复用已打开的 pyvips 图像（随机访问），各层级的缩小图也一并复用
+
+    pyvips 图像不可变，多个读取线程可以同时在同一句柄上裁剪。
+    """
+
+    def __init__(self, max_handles: int = 8) -> None:
+        self.max_handles = max_handles
+        self._lock = threading.Lock()
+        # 路径 -> (mtime_ns, {层级: 图像})
+        self._handles: "OrderedDict[str, Tuple[int, Dict[int, pyvips.Image]]]" = OrderedDict()
+
+    def get(self, file_path: str, level: int = 0) -> pyvips.Image:
+        key = path_key(file_path)
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None and entry[0] == mtime_ns:
+                self._handles.move_to_end(key)
+                levels = entry[1]
+                if level in levels:
+                    return levels[level]
+            else:
+                levels = {}
+
+        # 打开文件放在锁外，避免阻塞其他路径的读取
+        if 0 not in levels:
+            levels[0] = pyvips.Image.new_from_file(file_path, access="random")
+        if level > 0:
+            factor = 1 << level
+            levels[level] = levels[0].shrink(factor, factor)
+
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None and entry[0] == mtime_ns:
+                entry[1].update(levels)
+                levels = entry[1]
+            else:
+                self._handles[key] = (mtime_ns, levels)
+            self._handles.move_to_end(key)
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+            return levels[level]
+
+    def release(self, file_path: str) -> None:
+        with self._lock:
+            self._handles.pop(path_key(file_path), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._handles.clear()
+
+
+vips_handles = VipsHandlePool()
+
+
+def image_size(file_path: str) -> Tuple[int, int]:
+    """只读文件头获取原始尺寸"""
+    img = vips_handles.get(file_path)
+    return img.width, img.height
+
+
+def tile(file_path: str, x: int = 0, y: int = 0, w: int = 2048, h: int = 2048,
+         level: int = 0, is_cancelled: Optional[CancelCallback] = None) -> Optional[PixelBuffer]:
+    """读取图像指定区域，区域在图像之外时返回 None
+
+    level 为金字塔层级，第 L 层尺寸为原图的 1/2^L，坐标按该层像素计算。
+    """
+    img = vips_handles.get(file_path, level)
+    w = min(w, img.width - x)
+    h = min(h, img.height - y)
+    if w <= 0 or h <= 0:
+        return None
+    return to_pixel_buffer(img.crop(x, y, w, h), is_cancelled=is_cancelled)
+
+
+def read_metadata(file_path: str, st: os.stat_result, with_exif: bool = True) -> Dict[str, Any]:
+    """一次打开文件（PIL 只读文件头）得到尺寸、格式、DPI、色彩模式和 EXIF/GPS
+
+    st 为调用方已取得的 os.stat 结果，文件大小和修改时间都取自它。
+    """
+    info: Dict[str, Any] = {"file_info": {}, "image_info": {}, "exif_info": {}}
+
+    try:
+        info["file_info"] = {
+            "File Name": os.path.basename(file_path),
+            "Path": file_path,
+            "Size": f"{st.st_size / 1024:.2f} KB",
+            "Modified": datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        # 读取 EXIF 时 PIL 可能解码整张图（如 EXIF 块在像素之后的 PNG），保留解压炸弹检查
+        try:
+            img: Optional[Image.Image] = Image.open(file_path)
+        except Image.DecompressionBombError as e:
+            bomb_error = e
+            img = None
+
+        exif = None
+        if img is None:
+            # 像素数超出 PIL 的上限（多为分块显示的超大图像）：改读 libvips 文件头；
+            # libvips 也读不了的格式与 decode_strategy() 一样拒绝，报告 PIL 的错误
+            try:
+                info["image_info"], exif = _read_vips_header(file_path, with_exif)
+            except pyvips.Error:
+                raise bomb_error from None
+        else:
+            with img:
+                info["image_info"] = _pil_image_info(img)
+                if with_exif:
+                    exif = _get_exif_data(img)
+
+        if not with_exif:
+            # 标记 EXIF 尚未解析，需要时再读
+            info["exif_skipped"] = True
+        elif exif:
+            info["exif_info"] = exif
+
+    except Exception as e:
+        info["error"] = f"Could not read image info: {str(e)}"
+
+    return info
+
+
+def _pil_image_info(img: Image.Image) -> Dict[str, str]:
+    dpi = img.info.get("dpi", (72, 72))
+    return {
+        "Format": img.format or "Unknown",
+        "Color Mode": img.mode,
+        "Dimensions": f"{img.width} x {img.height} pixels",
+        "DPI": f"{dpi[0]} x {dpi[1]}",
+    }
+
+
+def _read_vips_header(file_path: str, with_exif: bool) -> Tuple[Dict[str, str], Optional[Dict[str, Any]]]:
+    """从 libvips 文件头读取图像信息和 EXIF，不解码像素"""
+    header = pyvips.Image.new_from_file(file_path)
+    loader = header.get("vips-loader")
+    # libvips 的分辨率单位是像素/毫米，文件未记录时为 1；与 PIL 一致按 72 DPI 显示
+    if header.xres == 1.0 and header.yres == 1.0:
+        dpi = 72, 72
+    else:
+        dpi = round(header.xres * 25.4), round(header.yres * 25.4)
+    image_info = {
+        "Format": loader[:-len("load")].upper() if loader.endswith("load") else loader,
+        "Color Mode": header.interpretation,
+        "Dimensions": f"{header.width} x {header.height} pixels",
+        "DPI": f"{dpi[0]} x {dpi[1]}",
+    }
+    exif = None
+    if with_exif and "exif-data" in header.get_fields():
+        raw = Image.Exif()
+        raw.load(header.get("exif-data"))
+        exif = _exif_to_dict(raw)
+    return image_info, exif
+
+
+# 超过该长度的二进制字段（如 MakerNote）只显示字节数，不做解码
+MAX_EXIF_BINARY = 256
+
+
+def _get_exif_data(image: Image.Image) -> Optional[Dict[str, Any]]:
+    """提取 EXIF 数据（含 Exif 子目录与 GPS）"""
+    try:
+        return _exif_to_dict(image.getexif())
+    except Exception:
+        return None
+
+
+def _exif_to_dict(raw: Image.Exif) -> Optional[Dict[str, Any]]:
+    """把 EXIF 目录转换为显示用的字典"""
+    try:
+        exif_data: Dict[str, Any] = {}
+        if not raw:
+            return None
+
+        def add(tag_id: int, value: Any) -> None:
+            tag = TAGS.get(tag_id, tag_id)
+            if isinstance(value, bytes):
+                if len(value) > MAX_EXIF_BINARY:
+                    value = f"Binary data ({len(value)} bytes)"
+                else:
+                    try:
+                        value = value.decode("utf-8", errors="replace")
+                    except Exception:
+                        value = "Binary data"
+            exif_data[tag] = value
+
+        for tag_id, value in raw.items():
+            if tag_id in (IFD.Exif, IFD.GPSInfo):
+                continue
+            add(tag_id, value)
+
+        # 相机参数在 Exif 子目录中，GPS 在单独的目录中
+        for tag_id, value in raw.get_ifd(IFD.Exif).items():
+            add(tag_id, value)
+        gps = raw.get_ifd(IFD.GPSInfo)
+        if gps:
+            exif_data["GPSInfo"] = {GPSTAGS.get(t, t): v for t, v in gps.items()}
+
+        return exif_data
+
+    except Exception:
+        return None
@@ -2,128 +2,227 @@
 from __future__ import annotations
 
 import os
-from datetime import datetime
-from typing import Any, Dict, Optional
-
-from PySide6.QtCore import QObject, Signal
-from PySide6.QtGui import QPixmap
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
-
-from image_cache import is_very_large, load_thumbnail
+from typing import Any, Dict, Optional, Tuple
+
+from PySide6.QtCore import QObject, Qt, Signal
+from PySide6.QtGui import QImage
+
+from image_cache import (DISPLAY_THUMB_EDGE, STRATEGY_REJECT, STRATEGY_TILED, CancelCallback,
+                         Cancelled, ProgressCallback, decode_qimage, decode_strategy, has_thumbnail,
+                         is_large, load_fit, load_preview, load_thumbnail, probe, to_qimage)
+from image_core import read_metadata
+from memory_cache import image_memory_cache
+from process_decoder import process_decoder
+
+# 延迟加载模式下没有廉价预览时，占位图的长边像素数
+PLACEHOLDER_EDGE = 64
+
+# 为 True 时普通大小的图像在子进程中解码（见设置中的多进程解码）
+_process_decoding = False
+
+
+def set_process_decoding(enabled: bool) -> None:
+    global _process_decoding
+    _process_decoding = enabled
+    if not enabled:
+        process_decoder.shutdown()
+
+
+def decode_image(file_path: str, progress: Optional[ProgressCallback] = None,
+                 is_cancelled: Optional[CancelCallback] = None) -> QImage:
+    """解码整张图像（超出解码预算的走 libvips 缩略图），供后台线程调用
+
+    progress 接收 0-100 的真实进度；is_cancelled 返回 True 时 libvips 中途停止并抛出 Cancelled。
+    多进程后端不报告进度。
+    """
+    strategy = decode_strategy(file_path)
+    if strategy == STRATEGY_REJECT:
+        # 只能由 PIL 整张解码且超出预算：宁可报错也不冒内存耗尽的风险
+        raise RuntimeError("Image exceeds the decode memory budget")
+    if strategy == STRATEGY_TILED:
+        image = load_thumbnail(file_path, DISPLAY_THUMB_EDGE, progress, is_cancelled)
+        if image.isNull():
+            raise RuntimeError("Thumbnail generation failed")
+    else:
+        image = None
+        if _process_decoding:
+            try:
+                image = to_qimage(process_decoder.decode(file_path))
+            except Exception:
+                # 进程池不可用时退回线程内解码
+                image = None
+        if image is None:
+            image = decode_qimage(file_path, progress, is_cancelled)
+        if image.isNull():
+            raise RuntimeError("Failed to load image")
+    return image
 
 
 class ImageLoader(QObject):
+    preview_ready = Signal(object, int, int, str)   # (预览图, 原图宽, 原图高, job_id)
+    reduced_ready = Signal(object, int, int, str)   # (按视口解码的图像, 原图宽, 原图高, job_id)
+    deferred_ready = Signal(object, int, int, str)  # (延迟加载的预览或占位图, 原图宽, 原图高, job_id)
     finished = Signal(object, str, str)
     info_ready = Signal(object, str)
     progress = Signal(int)
 
     def __init__(self, file_path: str,
                  performance_settings: dict[str, Any],
-                 job_id: str) -> None:
+                 job_id: str,
+                 want_exif: bool = True,
+                 viewport_size: Optional[Tuple[int, int]] = None) -> None:
         super().__init__()
         self.file_path = file_path
         self.performance_settings = performance_settings
         self.job_id = job_id
+        # 信息面板隐藏时不解析 EXIF，等面板显示后再单独请求
+        self.want_exif = want_exif
+        # 视口的设备像素尺寸；给出时大图先按视口解码，放大后再由 run_full 取完整分辨率
+        self.viewport_size = viewport_size
         self.canceled = False
+        self._last_progress = -1
 
     def _should_abort(self) -> bool:
-        # 只检查本线程的 canceled 标志
+        # 只检查本任务的 canceled 标志
         return self.canceled
 
     def run(self) -> None:
-        """执行加载任务"""
+        """解码像素（当前图像优先级）"""
+        self._load(self.viewport_size, with_preview=True)
+
+    def run_full(self) -> None:
+        """缩放超过已解码的比例后，解码完整分辨率"""
+        self._last_progress = -1
+        self._load(None, with_preview=False)
+
+    def _load(self, viewport_size: Optional[Tuple[int, int]], with_preview: bool) -> None:
         try:
             if self._should_abort():
                 return
 
-            if is_very_large(self.file_path):
-                pixmap = load_thumbnail(self.file_path, 4096)
-                if self._should_abort():
+            # 内存缓存命中时跳过解码
+            st = os.stat(self.file_path)
+            image = image_memory_cache.get(self.file_path, st)
+            if image is None:
+                very_large = decode_strategy(self.file_path) == STRATEGY_TILED
+                # 延迟加载：大图不做完整解码或按视口解码，只读文件头和廉价预览；
+                # 超大图像的显示用缩略图已缓存时照常显示
+                if (with_preview and self.performance_settings["lazy_loading"] and is_large(self.file_path)
+                        and not (very_large and has_thumbnail(self.file_path))):
+                    self._emit_deferred()
+                    self._report_progress(100)
+                    return
+                if not very_large and viewport_size is not None and self._emit_reduced(viewport_size, st):
+                    self._report_progress(100)
                     return
-                if pixmap.isNull():
-                    raise RuntimeError("Thumbnail generation failed")
-            else:
-                pixmap = QPixmap(self.file_path)
                 if self._should_abort():
                     return
-                if pixmap.isNull():
-                    raise RuntimeError("Failed to load image")
 
-            self.progress.emit(30)
-            image_info = self.collect_image_info(self.file_path)
-            if self._should_abort():
-                return
-            self.progress.emit(70)
+                # 先给出快速预览，再做完整解码
+                start = 0
+                if not very_large and with_preview:
+                    if self._emit_preview():
+                        start = 30
+                    if self._should_abort():
+                        return
+                # 解码进度映射到 start..95，作废时 libvips 中途停止
+                image = decode_image(self.file_path,
+                                     lambda percent: self._report_progress(start + (95 - start) * percent // 100),
+                                     self._should_abort)
+                if self._should_abort():
+                    return
+                image_memory_cache.put(self.file_path, image, st)
 
             # 把 job_id 一并发回去
-            self.finished.emit(pixmap, self.file_path, self.job_id)
-            self.info_ready.emit(image_info, self.job_id)
-            self.progress.emit(100)
+            self.finished.emit(image, self.file_path, self.job_id)
+            self._report_progress(100)
 
+        except Cancelled:
+            return
         except Exception as e:
             if not self.canceled:
                 self.finished.emit(None, f"Error: {str(e)}", self.job_id)
 
-    def collect_image_info(self, file_path: str) -> Dict[str, Any]:
-        """收集图像元信息"""
-        info: Dict[str, Any] = {"file_info": {}, "image_info": {}, "exif_info": {}}
-
+    def _report_progress(self, value: int) -> None:
+        """libvips 每批像素回调一次，只在百分比变化时发信号"""
+        if value > self._last_progress:
+            self._last_progress = value
+            self.progress.emit(value)
+
+    def _emit_reduced(self, viewport_size: Tuple[int, int], st: os.stat_result) -> bool:
+        """按视口大小解码（预取过的直接取内存缓存）；原图不比视口大多少或格式不支持时返回 False，由调用方完整解码"""
+        result = image_memory_cache.get_reduced(self.file_path, viewport_size, st)
+        if result is None:
+            width, height = viewport_size
+            try:
+                result = load_fit(self.file_path, width, height,
+                                  lambda percent: self._report_progress(percent * 95 // 100),
+                                  self._should_abort)
+            except Cancelled:
+                raise
+            except Exception:
+                return False
+            if result is None or self._should_abort():
+                return False
+            # 与完整分辨率分开缓存，回到这张图时不会直接拿到完整解码
+            image_memory_cache.put_reduced(self.file_path, viewport_size, *result, st=st)
+        image, full_width, full_height = result
+        self.reduced_ready.emit(image, full_width, full_height, self.job_id)
+        return True
+
+    def _emit_deferred(self) -> None:
+        """shrink-on-load 预览；格式不支持时按原图比例给出占位图，放大后再由 run_full 解码"""
         try:
-            info["file_info"] = {
-                "File Name": os.path.basename(file_path),
-                "Path": file_path,
-                "Size": f"{os.path.getsize(file_path) / 1024:.2f} KB",
-                "Modified": datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%Y-%m-%d %H:%M:%S"),
-            }
-
-            if self.performance_settings["skip_exif"]:
-                return info
-
-            with Image.open(file_path) as img:
-                info["image_info"] = {
-                    "Format": img.format or "Unknown",
-                    "Color Mode": img.mode,
-                    "Dimensions": f"{img.width} x {img.height} pixels",
-                    "DPI": f"{img.info.get('dpi', (72, 72))[0]} x {img.info.get('dpi', (72, 72))[1]}",
-                }
-
-                if not self.performance_settings["skip_exif"]:
-                    exif = self._get_exif_data(img)
-                    if exif:
-                        info["exif_info"] = exif
-
-        except Exception as e:
-            info["error"] = f"Could not read image info: {str(e)}"
-
-        return info
-
-    def _get_exif_data(self, image: Image.Image) -> Optional[Dict[str, Any]]:
-        """提取 EXIF 数据"""
+            preview = load_preview(self.file_path)
+        except Exception:
+            preview = None
+        if preview is not None:
+            image, width, height = preview
+        else:
+            info = probe(self.file_path)
+            width, height = info.width, info.height
+            edge = max(width, height)
+            image = QImage(max(1, PLACEHOLDER_EDGE * width // edge), max(1, PLACEHOLDER_EDGE * height // edge),
+                           QImage.Format.Format_Grayscale8)
+            image.fill(Qt.GlobalColor.darkGray)
+        if not self._should_abort():
+            self.deferred_ready.emit(image, width, height, self.job_id)
+
+    def _emit_preview(self) -> bool:
         try:
-            exif_data: Dict[str, Any] = {}
-            raw = image.getexif()
-            if not raw:
-                return None
-
-            for tag_id, value in raw.items():
-                tag = TAGS.get(tag_id, tag_id)
-                if isinstance(value, bytes):
-                    try:
-                        value = value.decode("utf-8", errors="replace")
-                    except Exception:
-                        value = "Binary data"
-
-                if tag == "GPSInfo":
-                    gps_data = {GPSTAGS.get(t, t): raw[tag_id][t] for t in raw[tag_id]}
-                    exif_data[tag] = gps_data
-                else:
-                    exif_data[tag] = value
-
-            return exif_data
-
+            preview = load_preview(self.file_path)
         except Exception:
-            return None
+            return False
+        if preview is None or self._should_abort():
+            return False
+        image, width, height = preview
+        self.preview_ready.emit(image, width, height, self.job_id)
+        self._report_progress(30)
+        return True
+
+    def run_info(self) -> None:
+        """收集元信息（元数据优先级，排在像素解码之后）"""
+        if self._should_abort():
+            return
+        image_info = self.collect_image_info(self.file_path)
+        if self._should_abort():
+            return
+        self.info_ready.emit(image_info, self.job_id)
+
+    def collect_image_info(self, file_path: str) -> Dict[str, Any]:
+        """收集图像元信息（优先取内存缓存，与像素数据缓存在同一条目）"""
+        try:
+            st = os.stat(file_path)
+        except OSError as e:
+            return {"file_info": {}, "image_info": {}, "exif_info": {},
+                    "error": f"Could not read image info: {str(e)}"}
+
+        with_exif = self.want_exif and not self.performance_settings["skip_exif"]
+        info = image_memory_cache.get_info(file_path, st)
+        if info is None or (with_exif and info.get("exif_skipped")):
+            info = read_metadata(file_path, st, with_exif)
+            image_memory_cache.put_info(file_path, info, st)
+        return info
 
     def cancel(self) -> None:
         """取消加载任务"""
@@ -1,3 +1,4 @@
+import math
 import os
 import uuid
 
@@ -6,13 +7,29 @@ from PySide6.QtWidgets import (QMainWindow, QLabel, QFileDialog, QVBoxLayout, QW
                              QTreeWidgetItem, QHeaderView, QProgressBar, QApplication, 
                              QDialog, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem)
 from PySide6.QtGui import QFont, QMovie, QAction, QActionGroup, QWheelEvent, QIcon, QTransform
-from PySide6.QtCore import Qt, QThread, QSize, QFile
+from PySide6.QtCore import Qt, QSize, QFile, QTimer, Signal
 from settings import SettingsManager, SettingsDialog
-from image_loader import ImageLoader
+from image_loader import ImageLoader, set_process_decoding
+from loader_pool import PRIORITY_CURRENT, PRIORITY_METADATA, PRIORITY_PREFETCH, LoaderPool
+from filmstrip import FilmstripView, ThumbnailListModel
+from folder_index import FolderIndex, is_image_file
+from image_cache import get_thumbnail_cache, image_size, is_very_large, path_key, set_decode_budget
+from memory_cache import image_memory_cache
+from memory_governor import (PRIORITY_CACHE, PRIORITY_DISPLAY, PRIORITY_MIPMAPS, PRIORITY_THUMBNAILS,
+                             PRIORITY_TILES, format_bytes, memory_governor)
+from mipmap import MipmapBuilder, MipmapImageItem
+from orientation import Orientation
+from prefetcher import Prefetcher
+from tile_renderer import TiledImageItem, tile_pool
 from language_manager import LanguageManager
 from PySide6 import QtGui
 
 class ZoomableGraphicsView(QGraphicsView):
+    zoomed = Signal()   # 滚轮缩放后发出
+
+    # 最后一次交互后多久恢复高质量渲染（毫秒）
+    IDLE_RENDER_DELAY = 150
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
@@ -27,7 +44,77 @@ class ZoomableGraphicsView(QGraphicsView):
         
         # 设置缓存背景
         self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+
+        # 快速渲染：拖动/滚轮缩放期间降低质量，空闲后再高质量重绘
+        self.quick_render = False
+        self._interacting = False
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(self.IDLE_RENDER_DELAY)
+        self._idle_timer.timeout.connect(self._end_interaction)
+
+    def set_quick_render(self, enabled: bool) -> None:
+        """开关自适应交互渲染"""
+        self.quick_render = enabled
+        if not enabled and self._interacting:
+            self._idle_timer.stop()
+            self._end_interaction()
+
+    def refresh_render_quality(self) -> None:
+        """按当前状态设置场景中图像项的采样方式（新图像项加入后调用）"""
+        self._set_quality(not self._interacting)
+
+    def _set_quality(self, smooth: bool) -> None:
+        self.setRenderHint(QtGui.QPainter.RenderHint.SmoothPixmapTransform, smooth)
+        self.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, smooth)
+        # 图像项会用自己的采样方式覆盖画笔设置
+        mode = (Qt.TransformationMode.SmoothTransformation if smooth
+                else Qt.TransformationMode.FastTransformation)
+        if self.scene():
+            for item in self.scene().items():
+                if isinstance(item, (QGraphicsPixmapItem, MipmapImageItem)):
+                    item.setTransformationMode(mode)
+        # 交互期间只重绘变化区域，平移时可以直接位移已有像素
+        self.setViewportUpdateMode(
+            QGraphicsView.ViewportUpdateMode.FullViewportUpdate if smooth
+            else QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+
+    def _begin_interaction(self, until_idle: bool = True) -> None:
+        if not self.quick_render:
+            return
+        if not self._interacting:
+            self._interacting = True
+            self._set_quality(False)
+        if until_idle:
+            self._idle_timer.start()
+        else:
+            self._idle_timer.stop()
+
+    def _end_interaction(self) -> None:
+        if not self._interacting:
+            return
+        self._interacting = False
+        self._set_quality(True)
+        self.viewport().update()
+
+    def mousePressEvent(self, event):
+        # 按住期间保持快速模式，松开后再计时
+        self._begin_interaction(until_idle=False)
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        if self._interacting:
+            self._idle_timer.start()
+
+    def scrollContentsBy(self, dx, dy):
+        # 覆盖滚动条拖动、键盘滚动等所有平移方式；按住鼠标拖动期间由松开事件计时
+        if not (self._interacting and not self._idle_timer.isActive()):
+            self._begin_interaction()
+        super().scrollContentsBy(dx, dy)
+
     def wheelEvent(self, event: QWheelEvent):
+        self._begin_interaction()
         if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
             zoom_in_factor = 1.15
             zoom_out_factor = 1 / zoom_in_factor
@@ -48,6 +135,7 @@ class ZoomableGraphicsView(QGraphicsView):
             self.translate(delta.x(), delta.y())
 
             event.accept()
+            self.zoomed.emit()
         else:
             # 平滑的普通滚动
             delta = event.angleDelta().y() * 0.5
@@ -70,9 +158,16 @@ class ImageViewer(QMainWindow):
         self.current_image_path = None
         self.setAcceptDrops(True)
         self.pixmap_item = None
+        self.preview_job_id = None        # 当前显示的是哪个任务的预览
+        self.reduced_scale = None         # 按视口解码时，已解码像素与原图的比例
+        self.full_res_pending = False     # 已请求完整分辨率，到达后只替换像素
+        self.resolution_deferred = False  # 延迟加载的预览：放大之前不取更精细的像素
+        self.mipmap_builder = None
         self.scale_factor = 1.0
         self.current_folder_images = []   # 同级目录图片列表
         self.current_folder_index = -1    # 当前图片在列表中的索引
+        self.nav_direction = 1            # 最近一次漫游方向，用于预取
+        self.orientations = {}            # path_key(文件路径) -> Orientation，旋转/镜像状态
         
         # 初始化设置管理器
         self.settings_manager = SettingsManager()
@@ -100,6 +195,7 @@ class ImageViewer(QMainWindow):
         self.graphics_view = ZoomableGraphicsView()
         self.graphics_scene = QGraphicsScene()
         self.graphics_view.setScene(self.graphics_scene)
+        self.graphics_view.zoomed.connect(self.ensure_full_resolution)
         self.graphics_view.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.graphics_view.setRenderHint(QtGui.QPainter.RenderHint.SmoothPixmapTransform)
         self.graphics_view.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)  # 支持拖动
@@ -146,6 +242,11 @@ class ImageViewer(QMainWindow):
         
         self.info_dock.setWidget(self.info_tree)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.info_dock)
+        self.info_dock.visibilityChanged.connect(self._on_info_dock_visibility)
+        self.current_info = None          # 当前图像的元信息
+        self.info_deferred = False        # 延迟加载模式下尚未读取元信息
+        self.info_loader = None           # 面板显示后单独请求 EXIF 的加载器
+        self._info_fill_token = 0
         
         self.splitter.addWidget(self.graphics_view)
         self.splitter.addWidget(self.info_dock)
@@ -165,13 +266,83 @@ class ImageViewer(QMainWindow):
         # 状态栏
         self.statusBar().showMessage("Ready")
         
-        # 后台加载线程
-        self.loader_thread = None
+        # 后台加载线程池
+        self.loader_pool = LoaderPool(parent=self)
         self.image_loader = None
+
+        # 相邻图像预取
+        self.prefetcher = Prefetcher(self.loader_pool, parent=self)
+
+        # 同级目录图片索引，漫游、状态栏、拖放和缩略图条共用
+        self.folder_index = FolderIndex(self.loader_pool, self)
+        self.folder_index.changed.connect(self.on_folder_index_changed)
+
+        # 缩略图条
+        self.filmstrip_dock = QDockWidget("Filmstrip", self)
+        self.filmstrip_dock.setFeatures(QDockWidget.DockWidgetFeature.DockWidgetMovable | 
+                                       QDockWidget.DockWidgetFeature.DockWidgetFloatable)
+        self.filmstrip_model = ThumbnailListModel(self.folder_index, self)
+        self.filmstrip = FilmstripView(self.filmstrip_model)
+        self.filmstrip.image_activated.connect(self.open_from_filmstrip)
+        self.filmstrip_dock.setWidget(self.filmstrip)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.filmstrip_dock)
+        self.filmstrip_dock.setVisible(self.settings["general"]["show_filmstrip"])
+
+        # 全局内存预算
+        self.setup_memory_governor()
         
         # 应用初始设置
         self.apply_initial_settings()
     
+    # 内存预算检查与状态栏刷新的间隔（毫秒）
+    MEMORY_CHECK_INTERVAL = 1000
+
+    def setup_memory_governor(self) -> None:
+        """把各类像素占用登记到全局内存预算，定时按优先级回收并在状态栏显示用量"""
+        memory_governor.register("cache", PRIORITY_CACHE,
+                                 lambda: image_memory_cache.total_bytes, image_memory_cache.trim)
+        memory_governor.register("thumbnails", PRIORITY_THUMBNAILS,
+                                 self.filmstrip_model.thumbnail_bytes, self.filmstrip_model.trim_thumbnails)
+        memory_governor.register("tiles", PRIORITY_TILES, self._tile_bytes, self._trim_tiles)
+        memory_governor.register("mipmaps", PRIORITY_MIPMAPS, self._mipmap_bytes, self._trim_mipmaps)
+        memory_governor.register("display", PRIORITY_DISPLAY, self._display_bytes)
+
+        self.memory_label = QLabel()
+        self.memory_label.setObjectName("memory_label")
+        self.statusBar().addPermanentWidget(self.memory_label)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.setInterval(self.MEMORY_CHECK_INTERVAL)
+        self.memory_timer.timeout.connect(self.update_memory_usage)
+        self.memory_timer.start()
+
+    def update_memory_usage(self) -> None:
+        total = memory_governor.enforce()
+        self.memory_label.setText(self.tr("status_memory",
+                                          used=format_bytes(total),
+                                          budget=format_bytes(memory_governor.budget)))
+
+    def _display_bytes(self) -> int:
+        if isinstance(self.pixmap_item, TiledImageItem):
+            return self.pixmap_item.preview_bytes()
+        if isinstance(self.pixmap_item, MipmapImageItem):
+            return self.pixmap_item.image_bytes()
+        return 0
+
+    def _tile_bytes(self) -> int:
+        return self.pixmap_item.tile_bytes() if isinstance(self.pixmap_item, TiledImageItem) else 0
+
+    def _trim_tiles(self, max_bytes: int) -> None:
+        if isinstance(self.pixmap_item, TiledImageItem):
+            self.pixmap_item.trim_tiles(max_bytes)
+
+    def _mipmap_bytes(self) -> int:
+        return self.pixmap_item.mipmap_bytes() if isinstance(self.pixmap_item, MipmapImageItem) else 0
+
+    def _trim_mipmaps(self, max_bytes: int) -> None:
+        # 层级只能整组丢弃，之后缩小显示直接采样原像素
+        if isinstance(self.pixmap_item, MipmapImageItem) and max_bytes < self.pixmap_item.mipmap_bytes():
+            self.pixmap_item.clear_mipmaps()
+
     def tr(self, key, **kwargs):
         """翻译文本的便捷方法"""
         return self.language_manager.tr(key, **kwargs)
@@ -183,6 +354,7 @@ class ImageViewer(QMainWindow):
         
         # 信息面板标题
         self.info_dock.setWindowTitle(self.tr("dock_info_title"))
+        self.filmstrip_dock.setWindowTitle(self.tr("dock_filmstrip_title"))
         
         # 菜单项
         self.file_menu.setTitle(self.tr("menu_file"))
@@ -194,6 +366,7 @@ class ImageViewer(QMainWindow):
         self.exit_action.setText(self.tr("menu_exit"))
         self.settings_action.setText(self.tr("menu_settings_app"))
         self.info_toggle.setText(self.tr("menu_info_panel"))
+        self.filmstrip_toggle.setText(self.tr("menu_filmstrip"))
         
         # 最近文件菜单
         self.recent_menu.setTitle(self.tr("menu_recent"))
@@ -233,6 +406,9 @@ class ImageViewer(QMainWindow):
         self.info_dock.setVisible(self.settings["general"]["show_info_panel"])
         if hasattr(self, 'info_toggle'):
             self.info_toggle.setChecked(self.settings["general"]["show_info_panel"])
+        self.filmstrip_dock.setVisible(self.settings["general"]["show_filmstrip"])
+        if hasattr(self, 'filmstrip_toggle'):
+            self.filmstrip_toggle.setChecked(self.settings["general"]["show_filmstrip"])
         
         # 初始化主题菜单勾选状态
         if hasattr(self, 'dark_action') and hasattr(self, 'light_action'):
@@ -255,6 +431,9 @@ class ImageViewer(QMainWindow):
         self.info_dock.setVisible(self.settings["general"]["show_info_panel"])
         if hasattr(self, 'info_toggle'):
             self.info_toggle.setChecked(self.settings["general"]["show_info_panel"])
+        self.filmstrip_dock.setVisible(self.settings["general"]["show_filmstrip"])
+        if hasattr(self, 'filmstrip_toggle'):
+            self.filmstrip_toggle.setChecked(self.settings["general"]["show_filmstrip"])
 
         # 更新主题菜单勾选状态
         if hasattr(self, 'dark_action') and hasattr(self, 'light_action'):
@@ -274,10 +453,40 @@ class ImageViewer(QMainWindow):
         elif state == "fullscreen":
             self.showFullScreen()
 
+    @staticmethod
+    def trim_thumbnail_cache(max_bytes: int) -> None:
+        """在线程池中执行：按新的上限淘汰磁盘缩略图，空闲页多时压缩数据库"""
+        cache = get_thumbnail_cache()
+        cache.set_max_bytes(max_bytes)
+        cache.compact()
+
     def apply_performance_settings(self):
         """应用性能优化设置"""
         # 应用性能设置
         self.setProperty("quick_render", self.settings["performance"]["quick_render"])
+        self.graphics_view.set_quick_render(self.settings["performance"]["quick_render"])
+
+        # 磁盘缩略图缓存上限：淘汰和随后的压缩与数据库大小成正比，在后台进行
+        cache_bytes = self.settings["performance"]["cache_size"] << 20
+        self.loader_pool.submit(lambda: self.trim_thumbnail_cache(cache_bytes), PRIORITY_PREFETCH)
+
+        # 完整解码的内存预算，超出的图像改用缩略图加分块显示
+        set_decode_budget(self.settings["performance"]["decode_budget"] << 20)
+
+        # 全局内存预算，超出时按优先级回收
+        memory_governor.set_budget(self.settings["performance"]["memory_budget"] << 20)
+        self.update_memory_usage()
+
+        # 已解码图像的内存缓存上限
+        image_memory_cache.set_max_bytes(self.settings["performance"]["cache_size"] << 20)
+
+        # 预取数量；延迟加载模式下不预取超大图像
+        self.prefetcher.lazy = self.settings["performance"]["lazy_loading"]
+        self.prefetcher.ahead = self.settings["performance"]["prefetch_ahead"]
+        self.prefetcher.behind = self.settings["performance"]["prefetch_behind"]
+
+        # 多进程解码后端
+        set_process_decoding(self.settings["performance"]["process_decoding"])
 
     def apply_appearance_settings(self):
         """应用外观设置（字体、样式等）"""
@@ -419,6 +628,14 @@ class ImageViewer(QMainWindow):
         self.info_toggle.toggled.connect(self._toggle_info_panel)
         self.view_menu.addAction(self.info_toggle)
 
+        # 缩略图条开关
+        self.filmstrip_toggle = QAction(self.tr("menu_filmstrip"), self)
+        self.filmstrip_toggle.setShortcut("Ctrl+T")
+        self.filmstrip_toggle.setCheckable(True)
+        self.filmstrip_toggle.setChecked(self.settings["general"]["show_filmstrip"])
+        self.filmstrip_toggle.toggled.connect(self._toggle_filmstrip)
+        self.view_menu.addAction(self.filmstrip_toggle)
+
         # 主题子菜单
         theme_menu = self.view_menu.addMenu(self.tr("settings_theme"))
         theme_ag = QActionGroup(self)  # 互斥组
@@ -474,6 +691,8 @@ class ImageViewer(QMainWindow):
     def open_recent_file(self, file_path):
         """打开最近文件"""
         if os.path.exists(file_path):
+            # 对话框、拖放与目录索引给出的路径分隔符可能不同，统一为绝对路径
+            file_path = os.path.abspath(file_path)
             # 先停止任何正在进行的加载
             self.stop_current_loading()
             
@@ -517,6 +736,12 @@ class ImageViewer(QMainWindow):
         self.settings_manager.update_setting("general", "show_info_panel", visible)
         self.settings_manager.save_settings()
 
+    def _toggle_filmstrip(self, visible):
+        """切换缩略图条可见性"""
+        self.filmstrip_dock.setVisible(visible)
+        self.settings_manager.update_setting("general", "show_filmstrip", visible)
+        self.settings_manager.save_settings()
+
     def _open_image(self):
         """打开图像文件"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -526,6 +751,7 @@ class ImageViewer(QMainWindow):
             "Images (*.png *.jpg *.jpeg *.bmp *.gif *.tiff *.tif *.webp)"
         )
         if file_path:
+            file_path = os.path.abspath(file_path)
             # 先停止任何正在进行的加载
             self.stop_current_loading()
             
@@ -552,48 +778,165 @@ class ImageViewer(QMainWindow):
         # 1. 生成新版本号
         ImageViewer.current_job_id = uuid.uuid4().hex
 
-        # 2. 停旧线程（协作式）
+        # 2. 取消旧任务（协作式，不等待）；上一张图像的相邻预取一并作废，
+        #    打开其他目录或跳转时不再继续解码旧目录的图像
         self.stop_current_loading()
+        self.prefetcher.cancel()
+
+        # 目录索引与解码并行建立，同一目录直接复用
+        self.folder_index.set_folder(os.path.dirname(file_path))
 
-        # 3. 创建加载器/线程
+        # 3. 创建加载器（信息面板隐藏时推迟 EXIF 解析，延迟加载模式下连基本信息也推迟）
+        self.current_info = None
+        self.info_deferred = self.settings["performance"]["lazy_loading"] and self.info_dock.isHidden()
         self.image_loader = ImageLoader(
             file_path,
             self.settings["performance"],
-            ImageViewer.current_job_id
+            ImageViewer.current_job_id,
+            want_exif=not self.info_dock.isHidden(),
+            viewport_size=self.viewport_device_size()
         )
-        self.loader_thread = QThread()
-        self.image_loader.moveToThread(self.loader_thread)
 
-        # 4. 连接信号
+        # 4. 连接信号（加载器在界面线程创建，工作线程发出的信号自动排队）
+        self.image_loader.preview_ready.connect(self.on_preview_ready)
+        self.image_loader.reduced_ready.connect(self.on_reduced_ready)
+        self.image_loader.deferred_ready.connect(self.on_deferred_ready)
         self.image_loader.finished.connect(self.on_image_loaded)
         self.image_loader.info_ready.connect(self.on_info_ready)
         self.image_loader.progress.connect(self.progress_bar.setValue)
-        self.loader_thread.started.connect(self.image_loader.run)
-        self.loader_thread.finished.connect(self.loader_thread.deleteLater)
 
-        # 5. 启动
-        self.loader_thread.start()
+        # 5. 提交到常驻线程池：像素优先，元数据随后
+        self.loader_pool.submit(self.image_loader.run, PRIORITY_CURRENT, ImageViewer.current_job_id)
+        if not self.info_deferred:
+            self.loader_pool.submit(self.image_loader.run_info, PRIORITY_METADATA, ImageViewer.current_job_id)
 
-    def on_image_loaded(self, pixmap, file_path, job_id: str) -> None:
+    def on_preview_ready(self, image, width: int, height: int, job_id: str) -> None:
+        """先显示快速预览；预览按原图尺寸缩放，场景坐标与完整图像一致"""
+        if job_id != ImageViewer.current_job_id or image.isNull():
+            return
+
+        self.reset_canvas()
+        self.graphics_scene.clear()
+
+        self.pixmap_item = MipmapImageItem(image)
+        self.pixmap_item.setScale(width / image.width())
+        self.graphics_scene.addItem(self.pixmap_item)
+        self.graphics_view.refresh_render_quality()
+        self.apply_orientation()
+        self.graphics_view.fitInView(self.pixmap_item, Qt.AspectRatioMode.KeepAspectRatio)
+        self.preview_job_id = job_id
+
+        # 预览已可见，只保留进度条
+        self.loading_label.setVisible(False)
+        self.loading_movie.stop()
+
+    def viewport_device_size(self):
+        """视口的设备像素尺寸，作为大图首次解码的目标大小；视口尚未布局时返回 None"""
+        viewport = self.graphics_view.viewport()
+        ratio = viewport.devicePixelRatioF()
+        width, height = round(viewport.width() * ratio), round(viewport.height() * ratio)
+        if width < 64 or height < 64:
+            return None
+        return width, height
+
+    def on_reduced_ready(self, image, width: int, height: int, job_id: str) -> None:
+        """按视口解码的图像：与预览一样按原图尺寸缩放显示
+
+        放大超过其分辨率时再取完整像素，适应窗口时内存中只有屏幕大小的像素；
+        解码期间视口变大时，到达后立即补取。
+        """
+        if job_id != ImageViewer.current_job_id or image.isNull():
+            return
+        self.on_preview_ready(image, width, height, job_id)
+        self.reduced_scale = image.width() / width
+        self.finish_image_loaded(self.image_loader.file_path)
+        self.ensure_full_resolution()
+
+    def on_deferred_ready(self, image, width: int, height: int, job_id: str) -> None:
+        """延迟加载的预览或占位图：即使比屏幕粗也保持显示，放大或 1:1 时才解码"""
+        if job_id != ImageViewer.current_job_id or image.isNull():
+            return
+        self.on_preview_ready(image, width, height, job_id)
+        self.reduced_scale = image.width() / width
+        self.resolution_deferred = True
+        self.finish_image_loaded(self.image_loader.file_path)
+
+    def ensure_full_resolution(self) -> None:
+        """缩放后屏幕像素比已解码像素更密时，请求完整分辨率（超大图像为显示用缩略图加分块），到达后原地替换"""
+        if self.reduced_scale is None or self.image_loader is None:
+            return
+        if self.preview_job_id != ImageViewer.current_job_id:
+            return
+        # 视图变换只含缩放（方向变换在图像项上），取第一列的长度即可
+        transform = self.graphics_view.transform()
+        view_scale = math.hypot(transform.m11(), transform.m12())
+        device_scale = view_scale * self.graphics_view.viewport().devicePixelRatioF()
+        if device_scale <= self.reduced_scale * 1.05:
+            return
+        self.request_full_resolution()
+
+    def request_full_resolution(self) -> None:
+        self.reduced_scale = None
+        self.resolution_deferred = False
+        self.full_res_pending = True
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.loader_pool.submit(self.image_loader.run_full, PRIORITY_CURRENT, ImageViewer.current_job_id)
+
+    def on_image_loaded(self, image, file_path, job_id: str) -> None:
         # 5. 主线程里比对版本号，过期直接丢弃
         if job_id != ImageViewer.current_job_id:
             return
-        if pixmap is None:
+        if image is None:
+            self.full_res_pending = False
+            self.progress_bar.setVisible(False)
             self.statusBar().showMessage(self.tr("error_load_image"))
             return
 
+        # 加载线程给出紧凑格式的 QImage，界面线程直接绘制，不再转换为 32 位的 QPixmap
+        # 已显示同一任务的预览：原地替换像素，保留用户在此期间的缩放和平移
+        if self.preview_job_id == job_id and isinstance(self.pixmap_item, MipmapImageItem):
+            self.preview_job_id = None
+            if is_very_large(file_path):
+                # 延迟加载的超大图像：预览换成以缩略图打底的分块图像
+                self.replace_with_tiled_item(file_path, image)
+            else:
+                self.pixmap_item.setImage(image)
+                self.pixmap_item.setScale(1.0)
+                # 方向变换绕图像中心，像素尺寸变化后要重新计算
+                self.apply_orientation()
+                self.request_mipmaps(image, job_id)
+            if self.full_res_pending:
+                # 图像早已显示并完成收尾，只需收起进度条
+                self.full_res_pending = False
+                self.progress_bar.setVisible(False)
+            else:
+                self.finish_image_loaded(file_path)
+            return
+        self.preview_job_id = None
+
         # 重置画布 - 先重置所有状态
         self.reset_canvas()
         
         # 清空旧图像
         self.graphics_scene.clear()
         
-        # 创建新的图像项
-        self.pixmap_item = QGraphicsPixmapItem(pixmap)
+        # 创建新的图像项：超大图像用分块渲染，缩略图作为最粗一级
+        self.pixmap_item = None
+        if is_very_large(file_path):
+            try:
+                width, height = image_size(file_path)
+                self.pixmap_item = TiledImageItem(file_path, width, height, image)
+            except Exception:
+                self.pixmap_item = None
+        if self.pixmap_item is None:
+            self.pixmap_item = MipmapImageItem(image)
+            self.request_mipmaps(image, job_id)
         self.graphics_scene.addItem(self.pixmap_item)
+        self.graphics_view.refresh_render_quality()
 
-        # 更新场景矩形以适应新图片
-        self.graphics_view.setSceneRect(self.graphics_scene.itemsBoundingRect())
+        # 应用记录的方向，并更新场景矩形以适应新图片
+        self.apply_orientation()
         
         # 自适应窗口大小
         self.graphics_view.fitInView(self.pixmap_item, Qt.AspectRatioMode.KeepAspectRatio)
@@ -602,35 +945,84 @@ class ImageViewer(QMainWindow):
         self.graphics_view.horizontalScrollBar().setValue(0)
         self.graphics_view.verticalScrollBar().setValue(0)
 
+        self.finish_image_loaded(file_path)
+
+    def replace_with_tiled_item(self, file_path: str, image) -> None:
+        """把预览图项换成分块图像项，视口中心仍对准同一图像位置，缩放保持不变"""
+        old_item = self.pixmap_item
+        old_image_width = old_item.image().width()
+        view = self.graphics_view
+        anchor = old_item.mapFromScene(view.mapToScene(view.viewport().rect().center()))
+        try:
+            width, height = image_size(file_path)
+            item = TiledImageItem(file_path, width, height, image)
+        except Exception:
+            # 读不到分块时只显示缩略图
+            old_item.setImage(image)
+            old_item.setScale(old_item.scale() * old_image_width / image.width())
+            self.apply_orientation(keep_view_center=True)
+            return
+
+        self.graphics_scene.clear()
+        self.pixmap_item = item
+        self.graphics_scene.addItem(item)
+        self.graphics_view.refresh_render_quality()
+        self.apply_orientation()
+        # 预览像素坐标换算到原图像素坐标
+        ratio = width / old_image_width
+        view.centerOn(item.mapToScene(anchor * ratio))
+
+    def request_mipmaps(self, image, job_id: str) -> None:
+        """后台生成缩小显示用的 mipmap，与当前任务同一 ID，切换图像时一并取消"""
+        self.mipmap_builder = MipmapBuilder(image, job_id)
+        self.mipmap_builder.ready.connect(self.on_mipmaps_ready)
+        self.loader_pool.submit(self.mipmap_builder.run, PRIORITY_PREFETCH, job_id)
+
+    def on_mipmaps_ready(self, levels, job_id: str) -> None:
+        if job_id != ImageViewer.current_job_id or not isinstance(self.pixmap_item, MipmapImageItem):
+            return
+        self.pixmap_item.set_mipmaps(levels)
+
+    def finish_image_loaded(self, file_path: str) -> None:
+        """图像显示后的收尾：隐藏加载状态、更新漫游信息并预取相邻图像"""
         # 隐藏加载动画
         self.loading_label.setVisible(False)
         self.loading_movie.stop()
         self.progress_bar.setVisible(False)
         self.statusBar().showMessage(f"Loaded: {os.path.basename(file_path)}")
 
-        # 清理线程（使用新的安全方法）
-        self.stop_current_loading()
-
         self.init_folder_roaming(file_path)
         
         self.update_roam_status()
 
+        # 当前图像显示后再预取相邻图像，避免与其争抢 CPU
+        self.prefetcher.schedule(self.current_folder_images, self.current_folder_index, self.nav_direction,
+                                 self.viewport_device_size())
+        self.nav_direction = 1
+
     def on_info_ready(self, image_info, job_id: str) -> None:
         if job_id != ImageViewer.current_job_id:
             return
         """图片信息加载完成时的处理（单列嵌套显示）"""
+        self.current_info = image_info
+        self.info_deferred = False
         self.info_tree.clear()
+        # 作废尚未填充完的上一批 EXIF
+        self._info_fill_token += 1
 
-        def add_section(title, data):
+        def add_section(title, data, batched=False):
             """把一段字典信息挂到树上"""
             if not data:
                 return
             root = QTreeWidgetItem([title])
             self.info_tree.addTopLevelItem(root)
+            root.setExpanded(True)
+            if batched:
+                self._fill_info_batches(root, list(data.items()), self._info_fill_token)
+                return
             for k, v in data.items():
                 child = QTreeWidgetItem([f"{k}: {v}"])
                 root.addChild(child)
-            root.setExpanded(True)
 
         # 1) 文件信息
         add_section(self.tr("file_info_title"), image_info.get("file_info", {}))
@@ -638,8 +1030,8 @@ class ImageViewer(QMainWindow):
         # 2) 图像技术信息
         add_section(self.tr("image_info_title"), image_info.get("image_info", {}))
 
-        # 3) EXIF 元数据
-        add_section(self.tr("exif_info_title"), image_info.get("exif_info", {}))
+        # 3) EXIF 元数据：分批填充，首帧不被大量标签阻塞
+        add_section(self.tr("exif_info_title"), image_info.get("exif_info", {}), batched=True)
 
         # 4) 错误信息（如果有）
         if image_info.get("error"):
@@ -648,6 +1040,44 @@ class ImageViewer(QMainWindow):
             err_root.addChild(QTreeWidgetItem([image_info["error"]]))
             err_root.setExpanded(True)
 
+        # 面板可见但 EXIF 尚未解析（加载时面板是隐藏的）
+        self.request_exif_if_needed()
+
+    def _fill_info_batches(self, root, items, token: int, batch: int = 64) -> None:
+        """每次事件循环只添加一批条目"""
+        if token != self._info_fill_token:
+            return
+        for k, v in items[:batch]:
+            root.addChild(QTreeWidgetItem([f"{k}: {v}"]))
+        rest = items[batch:]
+        if rest:
+            QTimer.singleShot(0, lambda: self._fill_info_batches(root, rest, token, batch))
+
+    def _on_info_dock_visibility(self, visible: bool) -> None:
+        if visible:
+            self.request_exif_if_needed()
+
+    def request_exif_if_needed(self) -> None:
+        """信息面板可见时才在后台解析 EXIF（延迟加载时连同基本信息），结果按文件缓存"""
+        if self.info_dock.isHidden() or not self.current_image_path:
+            return
+        if not self.info_deferred and (
+                not self.current_info
+                or not self.current_info.get("exif_skipped")
+                or self.settings["performance"]["skip_exif"]):
+            return
+        # 同一任务只请求一次
+        if self.info_loader is not None and self.info_loader.job_id == ImageViewer.current_job_id:
+            return
+        self.info_loader = ImageLoader(
+            self.current_image_path,
+            self.settings["performance"],
+            ImageViewer.current_job_id,
+            want_exif=True
+        )
+        self.info_loader.info_ready.connect(self.on_info_ready)
+        self.loader_pool.submit(self.info_loader.run_info, PRIORITY_METADATA, ImageViewer.current_job_id)
+
     def switch_theme(self, theme_name: str):
         """切换主题"""
         self.settings_manager.update_setting("appearance", "theme", theme_name)
@@ -674,8 +1104,7 @@ class ImageViewer(QMainWindow):
         files = [u.toLocalFile() for u in event.mimeData().urls()]
         for path in files:
             if os.path.isfile(path):
-                ext = os.path.splitext(path)[1].lower()
-                if ext in {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff', '.tif', '.webp'}:
+                if is_image_file(path):
                     self.open_recent_file(path)   # 复用现有加载逻辑
                     break   # 只取第一张
                 else:
@@ -764,6 +1193,7 @@ class ImageViewer(QMainWindow):
         if self.pixmap_item:
             self.scale_factor *= 1.2
             self.graphics_view.scale(1.2, 1.2)
+            self.ensure_full_resolution()
 
     def zoom_out(self):
         """缩小图像"""
@@ -777,11 +1207,15 @@ class ImageViewer(QMainWindow):
             # 重置缩放
             self.graphics_view.resetTransform()
             self.scale_factor = 1.0
+            self.ensure_full_resolution()
 
     def fit_to_window(self):
         """适应窗口大小"""
         if self.pixmap_item:
             self.graphics_view.fitInView(self.pixmap_item, Qt.AspectRatioMode.KeepAspectRatio)
+            # 窗口变大后已解码的像素可能不够清晰；延迟加载的预览等用户放大
+            if not self.resolution_deferred:
+                self.ensure_full_resolution()
             # 获取当前缩放比例
             view_rect = self.graphics_view.viewport().rect()
             scene_rect = self.graphics_view.mapToScene(view_rect).boundingRect()
@@ -790,7 +1224,7 @@ class ImageViewer(QMainWindow):
     
     def rotate_image(self, angle):
         """
-        旋转图像
+        旋转图像（只改变视图变换，像素不重新采样）
         
         Args:
             angle: 旋转角度（90：向右，-90：向左）
@@ -799,43 +1233,56 @@ class ImageViewer(QMainWindow):
             return
         
         try:
-            # 获取当前 pixmap
-            current_pixmap = self.pixmap_item.pixmap()
-            if current_pixmap.isNull():
-                return
-            
-            # 创建变换矩阵并旋转
-            transform = QTransform()
-            transform.rotate(angle)
-            
-            # 应用旋转变换
-            rotated_pixmap = current_pixmap.transformed(
-                transform, 
-                Qt.TransformationMode.SmoothTransformation
-            )
-            
-            # 更新图像
-            self.pixmap_item.setPixmap(rotated_pixmap)
-            
-            # 更新缩放以适应新方向
-            self.graphics_view.fitInView(self.pixmap_item, Qt.AspectRatioMode.KeepAspectRatio)
+            self.current_orientation().rotate(angle)
+            self.apply_orientation(keep_view_center=True)
             
             # 显示状态信息
             direction = "向左" if angle < 0 else "向右"
             self.statusBar().showMessage(f"已旋转 {abs(angle)}度 {direction}")
             
-            # 记录旋转状态（可选：用于保存功能）
-            if not hasattr(self, 'rotation_history'):
-                self.rotation_history = {}
-            self.rotation_history[self.current_image_path] = (
-                self.rotation_history.get(self.current_image_path, 0) + angle
-            ) % 360  # 保持在 0-360 度范围内
-            
         except Exception as e:
             self.statusBar().showMessage(f"旋转失败: {str(e)}")
 
+    def current_orientation(self) -> Orientation:
+        """当前图像的方向模型（按文件记录，重新打开时沿用）"""
+        return self.orientations.setdefault(path_key(self.current_image_path), Orientation())
+
+    def apply_orientation(self, keep_view_center: bool = False) -> None:
+        """把方向模型作为图形项变换应用，绕图像中心旋转/镜像
+
+        keep_view_center 为 True 时，视口中心仍对准变换前的同一图像位置，缩放保持不变。
+        """
+        if not self.pixmap_item or not self.current_image_path:
+            return
+        orientation = self.orientations.get(path_key(self.current_image_path))
+        view = self.graphics_view
+
+        anchor = None
+        if keep_view_center:
+            view_center = view.mapToScene(view.viewport().rect().center())
+            anchor = self.pixmap_item.mapFromScene(view_center)
+
+        if orientation is None or orientation.is_identity():
+            self.pixmap_item.setTransform(QTransform())
+        else:
+            self.pixmap_item.setTransform(orientation.transform_for(self.pixmap_item.boundingRect()))
+        view.setSceneRect(self.pixmap_item.sceneBoundingRect())
+
+        if anchor is not None:
+            view.centerOn(self.pixmap_item.mapToScene(anchor))
+
     def reset_canvas(self):
         """重置画布到初始状态"""
+        # 旧的分块图像不再需要后续分块，旧图像的 mipmap 随之释放
+        if isinstance(self.pixmap_item, TiledImageItem):
+            self.pixmap_item.cancel()
+        elif isinstance(self.pixmap_item, MipmapImageItem):
+            self.pixmap_item.clear_mipmaps()
+        self.mipmap_builder = None
+        self.reduced_scale = None
+        self.full_res_pending = False
+        self.resolution_deferred = False
+
         # 重置变换矩阵
         self.graphics_view.resetTransform()
         self.scale_factor = 1.0
@@ -854,65 +1301,41 @@ class ImageViewer(QMainWindow):
         self.graphics_view.setSceneRect(self.graphics_scene.itemsBoundingRect())
     
     def mirror_image(self):
-        """水平镜像图像"""
+        """水平镜像图像（只改变视图变换）"""
         if not self.pixmap_item or not self.current_image_path:
             return
         
         try:
-            # 获取当前 pixmap
-            current_pixmap = self.pixmap_item.pixmap()
-            if current_pixmap.isNull():
-                return
-            
-            # 创建水平镜像变换
-            transform = QTransform()
-            transform.scale(-1, 1)  # 水平翻转
-            transform.translate(-current_pixmap.width(), 0)  # 平移回正确位置
-            
-            # 应用变换
-            mirrored_pixmap = current_pixmap.transformed(
-                transform, 
-                Qt.TransformationMode.SmoothTransformation
-            )
-            
-            # 更新图像
-            self.pixmap_item.setPixmap(mirrored_pixmap)
+            self.current_orientation().mirror()
+            self.apply_orientation(keep_view_center=True)
             
             # 显示状态信息
             self.statusBar().showMessage("已应用水平镜像")
             
-            # 记录镜像状态（可选）
-            if not hasattr(self, 'mirror_state'):
-                self.mirror_state = {}
-            
-            # 切换镜像状态
-            current_mirrored = self.mirror_state.get(self.current_image_path, False)
-            self.mirror_state[self.current_image_path] = not current_mirrored
-            
         except Exception as e:
             self.statusBar().showMessage(f"镜像失败: {str(e)}")
-        if hasattr(self, 'mirror_state') and self.current_image_path in self.mirror_state:
-            del self.mirror_state[self.current_image_path]
 
     def stop_current_loading(self) -> None:
-        """安全停止当前加载线程"""
+        """取消当前加载任务：排队中的直接出队，进行中的在检查点自行退出"""
         if self.image_loader:
             self.image_loader.cancel()
-
-        # 2. 如果线程对象还在且确实在运行，才退出/等待
-        if self.loader_thread and self.loader_thread.isRunning():
-            self.loader_thread.quit()
-            if not self.loader_thread.wait(2000):
-                self.loader_thread.terminate()
-                self.loader_thread.wait()
-
-        # 3. 确定线程已结束后，再清引用
-        self.loader_thread = None
+            self.loader_pool.cancel(self.image_loader.job_id)
         self.image_loader = None
 
     def closeEvent(self, event):
         """窗口关闭时清理资源"""
         self.stop_current_loading()
+        self.prefetcher.cancel()
+        self.folder_index.cancel()
+        self.filmstrip_model.shutdown()
+        # 撤下排队的分块读取并等待正在读取的分块，避免向已销毁的图像项发信号
+        if isinstance(self.pixmap_item, TiledImageItem):
+            self.pixmap_item.cancel()
+        tile_pool.clear()
+        tile_pool.waitForDone(2000)
+        self.loader_pool.shutdown()
+        set_process_decoding(False)
+        get_thumbnail_cache().flush()
         event.accept()
 
     def themed_icon(self, name: str) -> QIcon:
@@ -934,31 +1357,30 @@ class ImageViewer(QMainWindow):
         self.next_image_action.setIcon(self.themed_icon("chevron-right"))
 
     def init_folder_roaming(self, image_path: str):
-        """根据已打开的图片，自动获取同级目录所有图片并初始化漫游列表"""
-        folder = os.path.dirname(image_path)
-        if not os.path.isdir(folder):
-            return
-
-        # 支持的扩展名
-        exts = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff', '.tif', '.webp'}
-        files = sorted(
-            [os.path.join(folder, f) for f in os.listdir(folder)
-            if os.path.isfile(os.path.join(folder, f)) and
-                os.path.splitext(f)[1].lower() in exts],
-            key=str.lower
-        )
-
-        if not files:
+        """根据已打开的图片，从同级目录索引中定位漫游列表；同一目录不会重新列出"""
+        self.folder_index.set_folder(os.path.dirname(image_path))
+        self.sync_folder_roaming()
+
+    def sync_folder_roaming(self):
+        """从目录索引刷新漫游列表和当前位置"""
+        files = self.folder_index.files
+        if not files or not self.current_image_path:
             self.current_folder_images = []
             self.current_folder_index = -1
-            return
-
-        self.current_folder_images = files
-        try:
-            self.current_folder_index = files.index(image_path)
-        except ValueError:
-            self.current_folder_index = 0
+        else:
+            self.current_folder_images = files
+            self.current_folder_index = max(0, self.folder_index.index_of(self.current_image_path))
         self.update_roam_status()
+        self.filmstrip.set_current_row(self.current_folder_index)
+
+    def on_folder_index_changed(self):
+        """后台扫描完成或目录内容变化"""
+        had_list = self.current_folder_index >= 0
+        self.sync_folder_roaming()
+        # 首次扫描晚于图像显示时，补上相邻图像预取
+        if not had_list and self.current_folder_index >= 0:
+            self.prefetcher.schedule(self.current_folder_images, self.current_folder_index, self.nav_direction,
+                                     self.viewport_device_size())
 
     def navigate_folder_image(self, direction: int):
         """方向：+1 下一张，-1 上一张"""
@@ -969,10 +1391,20 @@ class ImageViewer(QMainWindow):
         if new_index == self.current_folder_index:
             return
 
+        self.nav_direction = direction
+
         # 直接复用“打开最近文件”逻辑，无需再建加载器
         self.open_recent_file(self.current_folder_images[new_index])
         self.current_folder_index = new_index
 
+    def open_from_filmstrip(self, file_path: str):
+        """点击缩略图跳转"""
+        if self.current_image_path and path_key(file_path) == path_key(self.current_image_path):
+            return
+        row = self.folder_index.index_of(file_path)
+        self.nav_direction = 1 if row >= self.current_folder_index else -1
+        self.open_recent_file(file_path)
+
     def update_roam_status(self):
         """刷新右侧漫游信息"""
         if not self.current_folder_images or self.current_folder_index < 0:
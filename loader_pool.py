@@ -0,0 +1,92 @@
+"""常驻的图像加载线程池：带优先级的任务队列与按任务 ID 的协作式取消"""
+from __future__ import annotations
+
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Set
+
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool
+
+# 数值越大越先执行
+PRIORITY_CURRENT = 2    # 当前要显示的图像
+PRIORITY_PREFETCH = 1   # 相邻图像预取
+PRIORITY_METADATA = 0   # 元数据 / EXIF
+
+
+class _Job(QRunnable):
+    def __init__(self, pool: "LoaderPool", job_id: str, fn: Callable[[], None]) -> None:
+        super().__init__()
+        self.pool = pool
+        self.job_id = job_id
+        self.fn = fn
+
+    def run(self) -> None:
+        try:
+            if not self.pool.is_cancelled(self.job_id):
+                self.fn()
+        finally:
+            self.pool._finish(self.job_id, self)
+
+
+class LoaderPool(QObject):
+    """所有后台解码任务共用的线程池
+
+    线程常驻复用，不再为每次打开创建 QThread；取消只是标记任务 ID，
+    尚未开始的任务直接出队，进行中的任务在下一个检查点自行退出，界面线程从不等待。
+    """
+
+    def __init__(self, max_threads: Optional[int] = None, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or max(2, QThread.idealThreadCount() - 1))
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, List[_Job]] = {}   # 尚未结束的任务
+        self._cancelled: Set[str] = set()
+
+    def submit(self, fn: Callable[[], None], priority: int = PRIORITY_CURRENT,
+               job_id: Optional[str] = None) -> str:
+        """提交任务，返回任务 ID；同一 ID 可以提交多个任务并一起取消"""
+        job_id = job_id or uuid.uuid4().hex
+        job = _Job(self, job_id, fn)
+        # 由 Python 持有引用，出队时 tryTake 才能安全使用
+        job.setAutoDelete(False)
+        with self._lock:
+            self._jobs.setdefault(job_id, []).append(job)
+        self.pool.start(job, priority)
+        return job_id
+
+    def cancel(self, job_id: Optional[str]) -> None:
+        if not job_id:
+            return
+        with self._lock:
+            jobs = self._jobs.get(job_id)
+            if not jobs:
+                return
+            self._cancelled.add(job_id)
+            queued = list(jobs)
+        for job in queued:
+            if self.pool.tryTake(job):
+                self._finish(job_id, job)
+
+    def is_cancelled(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancelled
+
+    def _finish(self, job_id: str, job: _Job) -> None:
+        """任务执行完或被出队后释放引用"""
+        with self._lock:
+            jobs = self._jobs.get(job_id)
+            if jobs is None:
+                return
+            if job in jobs:
+                jobs.remove(job)
+            if not jobs:
+                del self._jobs[job_id]
+                self._cancelled.discard(job_id)
+
+    def shutdown(self, timeout_ms: int = 2000) -> None:
+        """退出程序时调用：清空队列并等待进行中的任务"""
+        with self._lock:
+            self._cancelled.update(self._jobs)
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
@@ -1,11 +1,15 @@
+import multiprocessing
 import os
 import sys
 os.environ['PATH'] += os.pathsep + os.path.abspath('vips/bin')
-from PySide6.QtWidgets import QApplication
-from image_viewer import ImageViewer
-os.environ["QT_IMAGEIO_MAXALLOC"] = "4096"
 
 if __name__ == "__main__":
+    # 多进程解码后端的子进程在打包后的程序中也能正确启动
+    multiprocessing.freeze_support()
+    # spawn 出的子进程会以 __mp_main__ 重新执行本文件：Qt 与界面模块只在主进程导入
+    from PySide6.QtWidgets import QApplication
+    from image_viewer import ImageViewer
+
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     app.setApplicationName("InfiniteSight")
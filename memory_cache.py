@@ -0,0 +1,180 @@
+"""已解码图像的内存 LRU 缓存（按字节计量）"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from PySide6.QtGui import QImage
+
+
+class _Entry:
+    __slots__ = ("stamp", "image", "reduced", "info")
+
+    def __init__(self, stamp: Tuple[int, int]) -> None:
+        self.stamp = stamp                      # (mtime_ns, 文件大小)
+        self.image: Optional[QImage] = None     # 完整分辨率
+        # 按视口解码的缩小图：(视口尺寸, 缩小图, 原图宽, 原图高)
+        self.reduced: Optional[Tuple[Tuple[int, int], QImage, int, int]] = None
+        self.info: Optional[Dict[str, Any]] = None
+
+    @property
+    def nbytes(self) -> int:
+        total = self.image.sizeInBytes() if self.image is not None else 0
+        if self.reduced is not None:
+            total += self.reduced[1].sizeInBytes()
+        return total
+
+
+class ImageMemoryCache:
+    """以 路径 + 修改时间 为键缓存 QImage 及其元信息，总字节数超过上限时淘汰最久未用的条目
+
+    完整分辨率与按视口解码的缩小图分开存放，取缩小图时须给出相同的视口尺寸。
+
+    QImage 可以跨线程共享，加载线程写入、界面线程读取都安全。
+    各方法可传入调用方已经取得的 os.stat 结果，避免重复 stat。
+    """
+
+    # 只有元信息的条目不占像素字节，再按条目数设一道上限
+    MAX_ENTRIES = 1024
+
+    def __init__(self, max_bytes: int = 100 << 20) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._total = 0
+
+    @staticmethod
+    def _norm(file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(file_path))
+
+    @staticmethod
+    def _stamp(file_path: str, st: Optional[os.stat_result]) -> Optional[Tuple[int, int]]:
+        try:
+            st = st or os.stat(file_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _lookup(self, file_path: str, st: Optional[os.stat_result]) -> Optional[_Entry]:
+        key = self._norm(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stamp = self._stamp(file_path, st)
+        with self._lock:
+            if stamp != entry.stamp:
+                self._drop_locked(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get(self, file_path: str, st: Optional[os.stat_result] = None) -> Optional[QImage]:
+        """命中且文件未修改时返回缓存图像"""
+        entry = self._lookup(file_path, st)
+        return entry.image if entry is not None else None
+
+    def get_reduced(self, file_path: str, viewport_size: Tuple[int, int],
+                    st: Optional[os.stat_result] = None) -> Optional[Tuple[QImage, int, int]]:
+        """命中且按同一视口尺寸解码时返回 (缩小图, 原图宽, 原图高)"""
+        entry = self._lookup(file_path, st)
+        if entry is None:
+            return None
+        reduced = entry.reduced
+        if reduced is None or reduced[0] != viewport_size:
+            return None
+        return reduced[1], reduced[2], reduced[3]
+
+    def get_info(self, file_path: str, st: Optional[os.stat_result] = None) -> Optional[Dict[str, Any]]:
+        """命中且文件未修改时返回缓存的元信息"""
+        entry = self._lookup(file_path, st)
+        return entry.info if entry is not None else None
+
+    def _entry_for_update(self, file_path: str, st: Optional[os.stat_result]) -> Optional[_Entry]:
+        """取得（必要时新建）可写入的条目，调用方需持有锁"""
+        stamp = self._stamp(file_path, st)
+        if stamp is None:
+            return None
+        key = self._norm(file_path)
+        entry = self._entries.get(key)
+        if entry is None or entry.stamp != stamp:
+            self._drop_locked(key)
+            entry = self._entries[key] = _Entry(stamp)
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, file_path: str, image: QImage, st: Optional[os.stat_result] = None) -> None:
+        """写入缓存，单张超过上限的图像不缓存"""
+        if image.isNull():
+            return
+        if image.sizeInBytes() > self.max_bytes:
+            return
+        with self._lock:
+            entry = self._entry_for_update(file_path, st)
+            if entry is None:
+                return
+            self._total -= entry.nbytes
+            entry.image = image
+            # 有了完整分辨率，缩小图不会再用到
+            entry.reduced = None
+            self._total += entry.nbytes
+            self._evict_locked()
+
+    def put_reduced(self, file_path: str, viewport_size: Tuple[int, int], image: QImage,
+                    full_width: int, full_height: int, st: Optional[os.stat_result] = None) -> None:
+        """写入按视口解码的缩小图，同一文件只保留最近一个视口尺寸的结果"""
+        if image.isNull() or image.sizeInBytes() > self.max_bytes:
+            return
+        with self._lock:
+            entry = self._entry_for_update(file_path, st)
+            if entry is None:
+                return
+            self._total -= entry.nbytes
+            entry.reduced = (viewport_size, image, full_width, full_height)
+            self._total += entry.nbytes
+            self._evict_locked()
+
+    def put_info(self, file_path: str, info: Dict[str, Any], st: Optional[os.stat_result] = None) -> None:
+        """把元信息与像素数据存在同一条目中"""
+        with self._lock:
+            entry = self._entry_for_update(file_path, st)
+            if entry is not None:
+                entry.info = info
+                self._evict_locked()
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max(0, max_bytes)
+            self._evict_locked()
+
+    def trim(self, max_bytes: int) -> None:
+        """内存紧张时淘汰最久未用的条目，直到像素总量不超过 max_bytes（上限设置不变）"""
+        with self._lock:
+            while self._entries and self._total > max_bytes:
+                _, entry = self._entries.popitem(last=False)
+                self._total -= entry.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def _drop_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total -= entry.nbytes
+
+    def _evict_locked(self) -> None:
+        while self._entries and (self._total > self.max_bytes or len(self._entries) > self.MAX_ENTRIES):
+            _, entry = self._entries.popitem(last=False)
+            self._total -= entry.nbytes
+
+
+image_memory_cache = ImageMemoryCache()
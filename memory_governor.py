@@ -0,0 +1,106 @@
+"""全局内存记账：已解码图像缓存、缩略图、分块、mipmap 与 libvips 共用一个预算
+
+各消费者登记"当前占用"和"回收到指定字节数"两个回调；总占用超过预算时，
+按优先级从低到高依次回收，当前显示的像素不回收。本模块不依赖 Qt，
+回调由登记方保证在合适的线程中调用（查看器在界面线程定时执行 enforce）。
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+import pyvips
+
+# 回收优先级：数值小的先回收
+PRIORITY_CACHE = 0          # 已解码图像缓存（含预取结果）
+PRIORITY_THUMBNAILS = 10    # 缩略图条
+PRIORITY_TILES = 20         # 当前图像的分块缓存
+PRIORITY_MIPMAPS = 30       # 当前图像的缩小层级
+PRIORITY_VIPS = 90          # libvips 操作缓存（预留额度，不回收）
+PRIORITY_DISPLAY = 100      # 当前显示的像素（不回收）
+
+DEFAULT_MEMORY_BUDGET = 4096 << 20
+
+# libvips 操作缓存占预算的比例及上限
+VIPS_CACHE_SHARE = 8
+MAX_VIPS_CACHE = 256 << 20
+
+UsageCallback = Callable[[], int]
+TrimCallback = Callable[[int], None]
+
+
+class _Consumer:
+    __slots__ = ("name", "priority", "usage", "trim")
+
+    def __init__(self, name: str, priority: int, usage: UsageCallback,
+                 trim: Optional[TrimCallback]) -> None:
+        self.name = name
+        self.priority = priority
+        self.usage = usage
+        self.trim = trim
+
+
+def format_bytes(n: int) -> str:
+    if n >= 1 << 30:
+        return f"{n / (1 << 30):.1f} GB"
+    return f"{n / (1 << 20):.0f} MB"
+
+
+class MemoryGovernor:
+    """按优先级回收的内存预算
+
+    pyvips 没有暴露 libvips 的实际内存统计，libvips 操作缓存按其上限计入预算，
+    上限随预算一起设置；解码中的像素在返回后由各缓存计入。
+    """
+
+    def __init__(self, budget: int = DEFAULT_MEMORY_BUDGET) -> None:
+        self._lock = threading.Lock()
+        self._consumers: Dict[str, _Consumer] = {}
+        self.budget = 0
+        self.register("libvips", PRIORITY_VIPS, pyvips.cache_get_max_mem)
+        self.set_budget(budget)
+
+    def register(self, name: str, priority: int, usage: UsageCallback,
+                 trim: Optional[TrimCallback] = None) -> None:
+        """登记消费者；trim 为 None 的消费者只计入用量，不参与回收"""
+        with self._lock:
+            self._consumers[name] = _Consumer(name, priority, usage, trim)
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._consumers.pop(name, None)
+
+    def set_budget(self, max_bytes: int) -> None:
+        self.budget = max(0, max_bytes)
+        pyvips.cache_set_max_mem(min(self.budget // VIPS_CACHE_SHARE, MAX_VIPS_CACHE))
+
+    def usage(self) -> Dict[str, int]:
+        """各消费者当前占用的字节数"""
+        with self._lock:
+            consumers = list(self._consumers.values())
+        return {c.name: c.usage() for c in consumers}
+
+    def total(self) -> int:
+        return sum(self.usage().values())
+
+    def enforce(self) -> int:
+        """超出预算时按优先级回收，返回回收后的总占用"""
+        with self._lock:
+            consumers: List[_Consumer] = sorted(self._consumers.values(), key=lambda c: c.priority)
+        usage = {c.name: c.usage() for c in consumers}
+        total = sum(usage.values())
+        excess = total - self.budget
+        for consumer in consumers:
+            if excess <= 0:
+                break
+            if consumer.trim is None or usage[consumer.name] <= 0:
+                continue
+            before = usage[consumer.name]
+            consumer.trim(max(0, before - excess))
+            freed = before - consumer.usage()
+            excess -= freed
+            total -= freed
+        return total
+
+
+memory_governor = MemoryGovernor()
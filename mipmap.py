@@ -0,0 +1,156 @@
+"""缩小显示用的多级纹理（mipmap）与以紧凑像素格式显示整张图像的图形项"""
+from __future__ import annotations
+
+import math
+from typing import List, Optional
+
+from PySide6.QtCore import QObject, QRectF, Qt, Signal
+from PySide6.QtGui import QImage, QPainter, QPixmap
+from PySide6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+import pyvips
+
+# 最长边不超过该值的图像不生成 mipmap；生成到最长边小于该值为止
+MIN_MIPMAP_EDGE = 1024
+
+
+# 加载线程给出的紧凑格式 -> (通道数, 缩小后层级的格式)；RGBA 预乘后再平均
+_COMPACT_FORMATS = {
+    QImage.Format.Format_Grayscale8: (1, QImage.Format.Format_Grayscale8),
+    QImage.Format.Format_RGB888: (3, QImage.Format.Format_RGB888),
+    QImage.Format.Format_RGBA8888: (4, QImage.Format.Format_RGBA8888_Premultiplied),
+}
+
+
+def build_mipmaps(image: QImage, min_edge: int = MIN_MIPMAP_EDGE) -> List[QImage]:
+    """逐级减半生成 ½、¼、⅛ … 的图像，可在工作线程中调用
+
+    紧凑格式由 libvips 在原像素上做 2×2 平均，不产生原图大小的 32 位中间副本
+    （QImage.scaled 会先把整张原图转换为 32 位）。各层级转换为光栅引擎直接绘制的
+    32 位格式，界面线程转换为 QPixmap 时只需复制。
+    """
+    native = (QImage.Format.Format_ARGB32_Premultiplied if image.hasAlphaChannel()
+              else QImage.Format.Format_RGB32)
+    compact = _COMPACT_FORMATS.get(image.format())
+    if compact is None or image.bytesPerLine() != image.width() * compact[0]:
+        return _build_mipmaps_qt(image, native, min_edge)
+
+    bands, level_format = compact
+    levels: List[QImage] = []
+    current = pyvips.Image.new_from_memory(image.constBits(), image.width(), image.height(), bands, "uchar")
+    if bands == 4:
+        # 非预乘的 RGBA 直接平均时，透明像素的颜色会渗到边缘
+        current = current.premultiply()
+    while max(current.width, current.height) > min_edge:
+        half = current.shrink(2, 2).cast("uchar")
+        data = half.write_to_memory()
+        # 下一级从这一级的紧凑像素继续减半
+        current = pyvips.Image.new_from_memory(data, half.width, half.height, bands, "uchar")
+        level = QImage(data, half.width, half.height, half.width * bands, level_format)
+        levels.append(level.convertToFormat(native))
+    return levels
+
+
+def _build_mipmaps_qt(image: QImage, native: QImage.Format, min_edge: int) -> List[QImage]:
+    """其他格式由 Qt 逐级缩小"""
+    levels: List[QImage] = []
+    current = image
+    while max(current.width(), current.height()) > min_edge:
+        current = current.scaled(max(1, current.width() // 2), max(1, current.height() // 2),
+                                 Qt.AspectRatioMode.IgnoreAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        if current.format() != native:
+            current = current.convertToFormat(native)
+        levels.append(current)
+    return levels
+
+
+class MipmapBuilder(QObject):
+    """在线程池中为一张图像生成 mipmap，结果随 job_id 发回界面线程"""
+
+    ready = Signal(object, str)   # (List[QImage], job_id)
+
+    def __init__(self, image: QImage, job_id: str) -> None:
+        super().__init__()
+        self.image = image
+        self.job_id = job_id
+
+    def run(self) -> None:
+        try:
+            levels = build_mipmaps(self.image)
+        except Exception:
+            return
+        # 生成完毕后不再持有原图
+        self.image = None
+        self.ready.emit(levels, self.job_id)
+
+
+class MipmapImageItem(QGraphicsItem):
+    """直接绘制 QImage 的图像项，按当前缩放从最接近的 mipmap 层级绘制
+
+    QPixmap 在光栅后端一律是 32 位；原图保留加载线程给出的紧凑格式（灰度 1 字节、
+    不透明 RGB 3 字节/像素），绘制时只转换露出的区域，缩放不小于 ½ 时露出的源像素
+    不超过视口的 4 倍。缩小显示用的 mipmap 层级在到达时一次转换为 QPixmap，
+    适应窗口和缩小时的每帧绘制不再做格式转换。
+    """
+
+    def __init__(self, image: QImage, parent: Optional[QGraphicsItem] = None) -> None:
+        super().__init__(parent)
+        self._image = image
+        self._levels: List[QPixmap] = []
+        self._mode = Qt.TransformationMode.FastTransformation
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
+
+    def image(self) -> QImage:
+        return self._image
+
+    def setImage(self, image: QImage) -> None:
+        # 像素被替换后旧层级失效
+        self.prepareGeometryChange()
+        self._image = image
+        self.clear_mipmaps()
+        self.update()
+
+    def image_bytes(self) -> int:
+        return self._image.sizeInBytes()
+
+    def transformationMode(self) -> Qt.TransformationMode:
+        return self._mode
+
+    def setTransformationMode(self, mode: Qt.TransformationMode) -> None:
+        if mode != self._mode:
+            self._mode = mode
+            self.update()
+
+    def set_mipmaps(self, levels: List[QImage]) -> None:
+        """在界面线程调用：QPixmap 只能在界面线程创建"""
+        self._levels = [QPixmap.fromImage(img) for img in levels]
+        self.update()
+
+    def clear_mipmaps(self) -> None:
+        self._levels = []
+
+    def mipmap_bytes(self) -> int:
+        return sum(pm.width() * pm.height() * pm.depth() // 8 for pm in self._levels)
+
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self._image.width(), self._image.height())
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None) -> None:
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform,
+                              self._mode == Qt.TransformationMode.SmoothTransformation)
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if exposed.isEmpty():
+            return
+        if self._levels:
+            lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+            if 0 < lod < 0.5:
+                # 选比显示尺寸略大的层级：第 L 层为原图的 1/2^L
+                level = min(len(self._levels), int(math.floor(math.log2(1.0 / lod))))
+                pm = self._levels[level - 1]
+                sx = pm.width() / self._image.width()
+                sy = pm.height() / self._image.height()
+                source = QRectF(exposed.x() * sx, exposed.y() * sy,
+                                exposed.width() * sx, exposed.height() * sy)
+                painter.drawPixmap(exposed, pm, source)
+                return
+        painter.drawImage(exposed, self._image, exposed)
@@ -0,0 +1,36 @@
+"""图像方向模型：旋转/镜像只作为视图变换，不改动像素"""
+from __future__ import annotations
+
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QTransform
+
+
+class Orientation:
+    """先水平镜像，再顺时针旋转 rotation 度（0/90/180/270）"""
+
+    def __init__(self, rotation: int = 0, mirrored: bool = False) -> None:
+        self.rotation = rotation % 360
+        self.mirrored = mirrored
+
+    def rotate(self, angle: int) -> None:
+        """屏幕上顺时针旋转 angle 度（负数为逆时针）"""
+        self.rotation = (self.rotation + angle) % 360
+
+    def mirror(self) -> None:
+        """屏幕上水平镜像：已旋转时镜像轴随之变换，等价于旋转角取反"""
+        self.mirrored = not self.mirrored
+        self.rotation = (-self.rotation) % 360
+
+    def is_identity(self) -> bool:
+        return self.rotation == 0 and not self.mirrored
+
+    def transform_for(self, rect: QRectF) -> QTransform:
+        """绕 rect 中心的变换，用作图形项的 transform，中心点保持不动"""
+        c = rect.center()
+        t = QTransform()
+        t.translate(c.x(), c.y())
+        t.rotate(self.rotation)
+        if self.mirrored:
+            t.scale(-1, 1)
+        t.translate(-c.x(), -c.y())
+        return t
@@ -0,0 +1,115 @@
+"""文件夹漫游时的相邻图像预取"""
+from __future__ import annotations
+
+import threading
+from typing import List, Optional, Tuple
+
+from PySide6.QtCore import QObject
+
+from image_cache import STRATEGY_FULL, Cancelled, decode_strategy, is_large, load_fit
+from image_loader import decode_image
+from loader_pool import PRIORITY_PREFETCH, LoaderPool
+from memory_cache import image_memory_cache
+
+
+class Prefetcher(QObject):
+    """根据当前索引和浏览方向，后台解码前 N 张、后 M 张图像
+
+    与打开图像时一样优先按视口大小解码，缩小图与完整分辨率分开缓存，切换过去时不会显示完整分辨率。
+    任务以预取优先级提交到共享的加载线程池，排在当前图像之后。
+    每次调度都会递增代号并撤下排队中的旧任务，进行中的旧任务在完成时丢弃结果。
+    """
+
+    def __init__(self, pool: LoaderPool, ahead: int = 2, behind: int = 1,
+                 parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.pool = pool
+        self.ahead = ahead
+        self.behind = behind
+        # 为 True 时不预取大图，与 ImageLoader 一样只在打开时读文件头
+        self.lazy = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._job_ids: List[str] = []
+
+    def is_stale(self, generation: int) -> bool:
+        with self._lock:
+            return generation != self._generation
+
+    def cancel(self) -> None:
+        """作废所有排队和进行中的预取"""
+        with self._lock:
+            self._generation += 1
+            job_ids, self._job_ids = self._job_ids, []
+        for job_id in job_ids:
+            self.pool.cancel(job_id)
+
+    def _prefetch(self, file_path: str, generation: int, viewport_size: Optional[Tuple[int, int]]) -> None:
+        """在线程池中解码一张图像并放入内存缓存"""
+        if self.is_stale(generation):
+            return
+        if image_memory_cache.get(file_path) is not None:
+            return
+        if viewport_size is not None and image_memory_cache.get_reduced(file_path, viewport_size) is not None:
+            return
+
+        def is_cancelled() -> bool:
+            # 导航变化后 libvips 中途停止，不再为过期的预取占用 CPU
+            return self.is_stale(generation)
+
+        try:
+            strategy = decode_strategy(file_path)
+            if self.lazy and (strategy != STRATEGY_FULL or is_large(file_path)):
+                return
+            if strategy == STRATEGY_FULL and viewport_size is not None:
+                try:
+                    reduced = load_fit(file_path, viewport_size[0], viewport_size[1], is_cancelled=is_cancelled)
+                except Cancelled:
+                    return
+                except Exception:
+                    # 格式不支持按视口解码，与 ImageLoader 一样退回完整解码
+                    reduced = None
+                if reduced is not None:
+                    if not self.is_stale(generation):
+                        image_memory_cache.put_reduced(file_path, viewport_size, *reduced)
+                    return
+            image = decode_image(file_path, is_cancelled=is_cancelled)
+        except Exception:
+            return
+        # 解码期间导航已变化，结果不再需要，避免挤掉更有用的缓存
+        if self.is_stale(generation):
+            return
+        image_memory_cache.put(file_path, image)
+
+    def schedule(self, images: List[str], index: int, direction: int = 1,
+                 viewport_size: Optional[Tuple[int, int]] = None) -> None:
+        """以 index 为中心预取；direction 为浏览方向，N 张沿方向、M 张反方向
+
+        viewport_size 为视口的设备像素尺寸，给出时大图只按视口解码。
+        """
+        self.cancel()
+        if not images or index < 0 or (self.ahead <= 0 and self.behind <= 0):
+            return
+
+        forward = 1 if direction >= 0 else -1
+        count = len(images)
+        offsets: List[int] = []
+        # 交替排列：先沿浏览方向最近的，再反方向最近的
+        for step in range(1, max(self.ahead, self.behind) + 1):
+            if step <= self.ahead:
+                offsets.append(forward * step)
+            if step <= self.behind:
+                offsets.append(-forward * step)
+
+        seen = {index}
+        with self._lock:
+            generation = self._generation
+        for offset in offsets:
+            i = (index + offset) % count
+            if i in seen:
+                continue
+            seen.add(i)
+            path = images[i]
+            job_id = self.pool.submit(lambda p=path: self._prefetch(p, generation, viewport_size), PRIORITY_PREFETCH)
+            with self._lock:
+                self._job_ids.append(job_id)
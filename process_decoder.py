@@ -0,0 +1,79 @@
+"""可选的多进程解码后端：像素经 multiprocessing.shared_memory 传回，不经过 pickle
+
+本模块不依赖 Qt。子进程以 spawn 方式启动，会重新执行入口文件（main.py 把 Qt 与界面模块的
+导入放在 __main__ 分支里），之后只导入本模块和 image_core。
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Optional
+
+import image_core
+from image_core import PixelBuffer
+
+
+def _decode_into(file_path: str, shm_name: str, nbytes: int) -> None:
+    """在子进程中执行：解码后把像素写入主进程分配的共享内存"""
+    buf = image_core.decode(file_path)
+    if buf.nbytes != nbytes:
+        raise RuntimeError(f"Decoded size mismatch: {buf.nbytes} != {nbytes}")
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        shm.buf[:nbytes] = buf.data
+    finally:
+        shm.close()
+
+
+class ProcessDecoder:
+    """在进程池中解码，绕开 GIL，多张相邻图像同时解码时随核心数扩展
+
+    共享内存由主进程按文件头给出的尺寸分配（各平台上生命周期都由主进程掌握），
+    子进程解码后写入，主进程取回像素后立即释放。进程池在第一次使用时才创建。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self.max_workers = max_workers or max(2, (os.cpu_count() or 2) - 1)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # 界面进程里有 Qt 线程，fork 不安全，统一用 spawn
+                self._executor = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def decode(self, file_path: str) -> PixelBuffer:
+        """阻塞等待子进程完成，调用线程等待期间不占用 GIL"""
+        width, height, bands = image_core.decoded_shape(file_path)
+        nbytes = width * height * bands
+        shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        try:
+            try:
+                self._get_executor().submit(_decode_into, file_path, shm.name, nbytes).result()
+            except BrokenProcessPool:
+                # 子进程异常退出（如内存不足被杀），下次使用时重建进程池
+                with self._lock:
+                    self._executor = None
+                raise
+            # 取回像素后共享内存即可释放，QImage 持有这份独立的缓冲
+            data = bytes(shm.buf[:nbytes])
+        finally:
+            shm.close()
+            shm.unlink()
+        return PixelBuffer(data, width, height, bands)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+process_decoder = ProcessDecoder()
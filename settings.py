@@ -11,6 +11,7 @@ class SettingsManager:
         "general": {
             "default_window_state": "normal",
             "show_info_panel": True,
+            "show_filmstrip": False,
             "recent_files": [],
             "max_recent_files": 5,
             "language": "en_us" 
@@ -19,7 +20,12 @@ class SettingsManager:
             "lazy_loading": True,
             "quick_render": False,
             "skip_exif": False,
-            "cache_size": 100,  # MB
+            "process_decoding": False,
+            "decode_budget": 1024,  # MB
+            "memory_budget": 4096,  # MB
+            "cache_size": 512,  # MB
+            "prefetch_ahead": 2,
+            "prefetch_behind": 1,
         },
         "appearance": {
             "ui_font": "Segoe UI",
@@ -42,6 +48,8 @@ class SettingsManager:
                                                     self.DEFAULT_SETTINGS["general"]["default_window_state"]),
             "show_info_panel": self.settings.value("general/show_info_panel", 
                                                 self.DEFAULT_SETTINGS["general"]["show_info_panel"], type=bool),
+            "show_filmstrip": self.settings.value("general/show_filmstrip", 
+                                               self.DEFAULT_SETTINGS["general"]["show_filmstrip"], type=bool),
             "recent_files": self.settings.value("general/recent_files", 
                                             self.DEFAULT_SETTINGS["general"]["recent_files"], type=list),
             "max_recent_files": self.settings.value("general/max_recent_files", 
@@ -58,8 +66,18 @@ class SettingsManager:
                                               self.DEFAULT_SETTINGS["performance"]["quick_render"], type=bool),
             "skip_exif": self.settings.value("performance/skip_exif", 
                                            self.DEFAULT_SETTINGS["performance"]["skip_exif"], type=bool),
+            "process_decoding": self.settings.value("performance/process_decoding", 
+                                                  self.DEFAULT_SETTINGS["performance"]["process_decoding"], type=bool),
+            "decode_budget": self.settings.value("performance/decode_budget", 
+                                               self.DEFAULT_SETTINGS["performance"]["decode_budget"], type=int),
+            "memory_budget": self.settings.value("performance/memory_budget", 
+                                               self.DEFAULT_SETTINGS["performance"]["memory_budget"], type=int),
             "cache_size": self.settings.value("performance/cache_size", 
-                                            self.DEFAULT_SETTINGS["performance"]["cache_size"], type=int)
+                                            self.DEFAULT_SETTINGS["performance"]["cache_size"], type=int),
+            "prefetch_ahead": self.settings.value("performance/prefetch_ahead", 
+                                                self.DEFAULT_SETTINGS["performance"]["prefetch_ahead"], type=int),
+            "prefetch_behind": self.settings.value("performance/prefetch_behind", 
+                                                 self.DEFAULT_SETTINGS["performance"]["prefetch_behind"], type=int)
         }
         
         # 加载外观设置
@@ -79,6 +97,7 @@ class SettingsManager:
         # 保存常规设置
         self.settings.setValue("general/default_window_state", self.current_settings["general"]["default_window_state"])
         self.settings.setValue("general/show_info_panel", self.current_settings["general"]["show_info_panel"])
+        self.settings.setValue("general/show_filmstrip", self.current_settings["general"]["show_filmstrip"])
         self.settings.setValue("general/recent_files", self.current_settings["general"]["recent_files"])
         self.settings.setValue("general/max_recent_files", self.current_settings["general"]["max_recent_files"])
         self.settings.setValue("general/language", self.current_settings["general"]["language"])
@@ -87,7 +106,12 @@ class SettingsManager:
         self.settings.setValue("performance/lazy_loading", self.current_settings["performance"]["lazy_loading"])
         self.settings.setValue("performance/quick_render", self.current_settings["performance"]["quick_render"])
         self.settings.setValue("performance/skip_exif", self.current_settings["performance"]["skip_exif"])
+        self.settings.setValue("performance/process_decoding", self.current_settings["performance"]["process_decoding"])
+        self.settings.setValue("performance/decode_budget", self.current_settings["performance"]["decode_budget"])
+        self.settings.setValue("performance/memory_budget", self.current_settings["performance"]["memory_budget"])
         self.settings.setValue("performance/cache_size", self.current_settings["performance"]["cache_size"])
+        self.settings.setValue("performance/prefetch_ahead", self.current_settings["performance"]["prefetch_ahead"])
+        self.settings.setValue("performance/prefetch_behind", self.current_settings["performance"]["prefetch_behind"])
         
         # 保存外观设置
         self.settings.setValue("appearance/ui_font", self.current_settings["appearance"]["ui_font"])
@@ -189,6 +213,9 @@ class SettingsDialog(QDialog):
         
         self.show_info_check = QCheckBox(self.tr("settings_show_info_panel"))
         window_layout.addRow(self.show_info_check)
+
+        self.show_filmstrip_check = QCheckBox(self.tr("settings_show_filmstrip"))
+        window_layout.addRow(self.show_filmstrip_check)
         
         # 最近文件
         self.max_recent_spin = QSpinBox()
@@ -234,7 +261,7 @@ class SettingsDialog(QDialog):
         image_group = QGroupBox(self.tr("settings_image_processing"))
         image_layout = QFormLayout()
         
-        self.lazy_loading_check = QCheckBox(self.tr("settings_lazy_exif"))
+        self.lazy_loading_check = QCheckBox(self.tr("settings_lazy_loading"))
         image_layout.addRow(self.lazy_loading_check)
         
         self.quick_render_check = QCheckBox(self.tr("settings_quick_render"))
@@ -242,6 +269,16 @@ class SettingsDialog(QDialog):
         
         self.skip_exif_check = QCheckBox(self.tr("settings_skip_exif"))
         image_layout.addRow(self.skip_exif_check)
+
+        self.process_decoding_check = QCheckBox(self.tr("settings_process_decoding"))
+        image_layout.addRow(self.process_decoding_check)
+
+        # 估算解码内存超过预算的图像改走缩略图 + 分块显示
+        self.decode_budget_spin = QSpinBox()
+        self.decode_budget_spin.setRange(256, 65536)
+        self.decode_budget_spin.setSingleStep(256)
+        self.decode_budget_spin.setSuffix(" MB")
+        image_layout.addRow(self.tr("settings_decode_budget"), self.decode_budget_spin)
         
         image_group.setLayout(image_layout)
         layout.addWidget(image_group)
@@ -251,9 +288,25 @@ class SettingsDialog(QDialog):
         cache_layout = QFormLayout()
         
         self.cache_size_spin = QSpinBox()
-        self.cache_size_spin.setRange(0, 1000)
+        self.cache_size_spin.setRange(0, 8192)
         self.cache_size_spin.setSuffix(" MB")
         cache_layout.addRow(self.tr("settings_cache_size"), self.cache_size_spin)
+
+        # 缓存、缩略图、分块和 mipmap 共用的总预算
+        self.memory_budget_spin = QSpinBox()
+        self.memory_budget_spin.setRange(512, 65536)
+        self.memory_budget_spin.setSingleStep(512)
+        self.memory_budget_spin.setSuffix(" MB")
+        cache_layout.addRow(self.tr("settings_memory_budget"), self.memory_budget_spin)
+        
+        # 漫游预取
+        self.prefetch_ahead_spin = QSpinBox()
+        self.prefetch_ahead_spin.setRange(0, 10)
+        cache_layout.addRow(self.tr("settings_prefetch_ahead"), self.prefetch_ahead_spin)
+        
+        self.prefetch_behind_spin = QSpinBox()
+        self.prefetch_behind_spin.setRange(0, 10)
+        cache_layout.addRow(self.tr("settings_prefetch_behind"), self.prefetch_behind_spin)
         
         cache_group.setLayout(cache_layout)
         layout.addWidget(cache_group)
@@ -331,6 +384,7 @@ class SettingsDialog(QDialog):
             window_state_map.get(settings["general"]["default_window_state"], 0)
         )
         self.show_info_check.setChecked(settings["general"]["show_info_panel"])
+        self.show_filmstrip_check.setChecked(settings["general"]["show_filmstrip"])
         self.max_recent_spin.setValue(settings["general"]["max_recent_files"])
 
         # 加载语言设置
@@ -346,7 +400,12 @@ class SettingsDialog(QDialog):
         self.lazy_loading_check.setChecked(settings["performance"]["lazy_loading"])
         self.quick_render_check.setChecked(settings["performance"]["quick_render"])
         self.skip_exif_check.setChecked(settings["performance"]["skip_exif"])
+        self.process_decoding_check.setChecked(settings["performance"]["process_decoding"])
+        self.decode_budget_spin.setValue(settings["performance"]["decode_budget"])
         self.cache_size_spin.setValue(settings["performance"]["cache_size"])
+        self.memory_budget_spin.setValue(settings["performance"]["memory_budget"])
+        self.prefetch_ahead_spin.setValue(settings["performance"]["prefetch_ahead"])
+        self.prefetch_behind_spin.setValue(settings["performance"]["prefetch_behind"])
         
         # 外观设置
         self.font_combo.setCurrentText(settings["appearance"]["ui_font"])
@@ -364,6 +423,8 @@ class SettingsDialog(QDialog):
                                            window_state_map[self.window_state_combo.currentIndex()])
         self.settings_manager.update_setting("general", "show_info_panel", 
                                            self.show_info_check.isChecked())
+        self.settings_manager.update_setting("general", "show_filmstrip", 
+                                           self.show_filmstrip_check.isChecked())
         self.settings_manager.update_setting("general", "max_recent_files", 
                                            self.max_recent_spin.value())
         
@@ -379,8 +440,18 @@ class SettingsDialog(QDialog):
                                            self.quick_render_check.isChecked())
         self.settings_manager.update_setting("performance", "skip_exif", 
                                            self.skip_exif_check.isChecked())
+        self.settings_manager.update_setting("performance", "process_decoding", 
+                                           self.process_decoding_check.isChecked())
+        self.settings_manager.update_setting("performance", "decode_budget", 
+                                           self.decode_budget_spin.value())
         self.settings_manager.update_setting("performance", "cache_size", 
                                            self.cache_size_spin.value())
+        self.settings_manager.update_setting("performance", "memory_budget", 
+                                           self.memory_budget_spin.value())
+        self.settings_manager.update_setting("performance", "prefetch_ahead", 
+                                           self.prefetch_ahead_spin.value())
+        self.settings_manager.update_setting("performance", "prefetch_behind", 
+                                           self.prefetch_behind_spin.value())
         
         # 外观设置
         self.settings_manager.update_setting("appearance", "ui_font", 
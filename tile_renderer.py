@@ -0,0 +1,196 @@
+"""超大图像的分块多分辨率渲染（基于 libvips 按需读取）"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QRectF, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QPainter, QPixmap
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsObject, QStyleOptionGraphicsItem
+
+from image_cache import load_tile
+
+TileKey = Tuple[int, int, int]  # (层级, 列, 行)
+
+TILE_SIZE = 512
+
+# 所有分块图像共享的读取线程池
+tile_pool = QThreadPool()
+tile_pool.setMaxThreadCount(max(2, QThreadPool.globalInstance().maxThreadCount() // 2))
+
+
+class _TileRequests:
+    """线程间共享的请求状态：纯 Python 对象，图形项销毁后仍可安全访问"""
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.wanted: Set[TileKey] = set()
+
+    def is_wanted(self, key: TileKey) -> bool:
+        with self.lock:
+            return key in self.wanted
+
+    def set_wanted(self, keys: Set[TileKey]) -> None:
+        with self.lock:
+            self.wanted = keys
+
+
+class _TileSignals(QObject):
+    ready = Signal(object, object)  # (TileKey, QImage)
+
+
+class _TileTask(QRunnable):
+    def __init__(self, requests: _TileRequests, key: TileKey, signals: _TileSignals) -> None:
+        super().__init__()
+        self.requests = requests
+        self.key = key
+        self.signals = signals
+
+    def run(self) -> None:
+        # 视口已移开的分块直接放弃
+        if not self.requests.is_wanted(self.key):
+            self.signals.ready.emit(self.key, None)
+            return
+        level, tx, ty = self.key
+        try:
+            # 较粗层级的分块要从原图缩小，计算期间移出视口也会中途停止
+            image = load_tile(self.requests.file_path,
+                              tx * TILE_SIZE, ty * TILE_SIZE, TILE_SIZE, TILE_SIZE, level,
+                              is_cancelled=lambda: not self.requests.is_wanted(self.key))
+        except Exception:
+            image = None
+        self.signals.ready.emit(self.key, image)
+
+
+class TiledImageItem(QGraphicsObject):
+    """以原图像素为场景坐标的分块图像项
+
+    绘制时按当前缩放选择金字塔层级，只请求视口内的分块；分块到达前先用
+    预览图和已缓存的较粗层级填充，到达后逐步替换为更精细的分块。
+    分块缓存按字节数限制，平移超大图像时内存保持平稳。
+    """
+
+    def __init__(self, file_path: str, width: int, height: int,
+                 preview: QImage, max_cache_bytes: int = 256 << 20,
+                 parent: Optional[QGraphicsItem] = None) -> None:
+        super().__init__(parent)
+        self.file_path = file_path
+        self.full_width = width
+        self.full_height = height
+        # 在界面线程创建：每帧打底时不再把 RGB888/灰度预览转换为 32 位
+        self.preview = QPixmap.fromImage(preview)
+        self.max_cache_bytes = max_cache_bytes
+
+        self._cache: "OrderedDict[TileKey, QPixmap]" = OrderedDict()
+        self._cache_bytes = 0
+        self._pending: Set[TileKey] = set()
+        self._requests = _TileRequests(file_path)
+        self._signals = _TileSignals()
+        self._signals.ready.connect(self._on_tile_ready)
+
+        # 比预览图更精细的层级才需要分块，更粗的层级直接用预览图
+        preview_w = max(1, preview.width())
+        self.use_tiles = width > preview_w
+        self.max_level = max(0, math.ceil(math.log2(width / preview_w)) - 1) if self.use_tiles else 0
+
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
+
+    # ---------------- QGraphicsItem 接口 ----------------
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self.full_width, self.full_height)
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None) -> None:
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if exposed.isEmpty():
+            return
+
+        # 1) 预览图打底
+        if not self.preview.isNull():
+            sx = self.preview.width() / self.full_width
+            sy = self.preview.height() / self.full_height
+            source = QRectF(exposed.x() * sx, exposed.y() * sy,
+                            exposed.width() * sx, exposed.height() * sy)
+            painter.drawPixmap(exposed, self.preview, source)
+
+        if not self.use_tiles:
+            return
+
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if lod <= 0:
+            return
+        level = int(math.floor(math.log2(1.0 / lod))) if lod < 1.0 else 0
+        if level > self.max_level:
+            self._requests.set_wanted(set())
+            return
+
+        # 2) 由粗到细绘制已缓存的分块，目标层级缺失的分块加入请求
+        for lvl in range(self.max_level, level - 1, -1):
+            for key in self._tiles_in_rect(lvl, exposed):
+                tile = self._cache.get(key)
+                if tile is not None:
+                    self._cache.move_to_end(key)
+                    painter.drawPixmap(self._tile_rect(key, tile), tile, QRectF(tile.rect()))
+
+        wanted = set(self._tiles_in_rect(level, exposed))
+        self._requests.set_wanted(wanted)
+        for key in wanted:
+            if key not in self._cache and key not in self._pending:
+                self._pending.add(key)
+                tile_pool.start(_TileTask(self._requests, key, self._signals))
+
+    # ---------------- 分块几何 ----------------
+    def _level_size(self, level: int) -> Tuple[int, int]:
+        f = 1 << level
+        return max(1, math.ceil(self.full_width / f)), max(1, math.ceil(self.full_height / f))
+
+    def _tiles_in_rect(self, level: int, rect: QRectF):
+        f = 1 << level
+        lw, lh = self._level_size(level)
+        cols = math.ceil(lw / TILE_SIZE)
+        rows = math.ceil(lh / TILE_SIZE)
+        span = TILE_SIZE * f
+        c0 = max(0, int(rect.left() // span))
+        c1 = min(cols - 1, int(rect.right() // span))
+        r0 = max(0, int(rect.top() // span))
+        r1 = min(rows - 1, int(rect.bottom() // span))
+        for ty in range(r0, r1 + 1):
+            for tx in range(c0, c1 + 1):
+                yield (level, tx, ty)
+
+    def _tile_rect(self, key: TileKey, tile: QPixmap) -> QRectF:
+        level, tx, ty = key
+        f = 1 << level
+        return QRectF(tx * TILE_SIZE * f, ty * TILE_SIZE * f,
+                      tile.width() * f, tile.height() * f).intersected(self.boundingRect())
+
+    # ---------------- 分块缓存 ----------------
+    def _on_tile_ready(self, key: TileKey, image: Optional[QImage]) -> None:
+        self._pending.discard(key)
+        if image is None or image.isNull():
+            return
+        tile = QPixmap.fromImage(image)
+        self._cache[key] = tile
+        self._cache_bytes += tile.width() * tile.height() * 4
+        while self._cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._cache_bytes -= old.width() * old.height() * 4
+        self.update(self._tile_rect(key, tile))
+
+    def preview_bytes(self) -> int:
+        return self.preview.width() * self.preview.height() * self.preview.depth() // 8
+
+    def tile_bytes(self) -> int:
+        return self._cache_bytes
+
+    def trim_tiles(self, max_bytes: int) -> None:
+        """内存紧张时淘汰最久未绘制的分块，移出后由预览图或较粗层级替代"""
+        while self._cache and self._cache_bytes > max_bytes:
+            _, old = self._cache.popitem(last=False)
+            self._cache_bytes -= old.width() * old.height() * 4
+
+    def cancel(self) -> None:
+        """放弃所有尚未开始的分块请求"""
+        self._requests.set_wanted(set())
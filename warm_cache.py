@@ -0,0 +1,158 @@
+"""缩略图缓存预热工具（命令行，无需图形界面）
+
+遍历目录树，用多进程为每张图片生成查看器会请求的缩略图，由子进程直接写入缓存数据库：
+    python warm_cache.py D:/datasets E:/renders --jobs 8
+
+已缓存的文件会跳过，中断后重新运行即可从断点继续。
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+os.environ['PATH'] += os.pathsep + os.path.abspath('vips/bin')
+import pyvips
+from PySide6.QtCore import QSettings
+
+from image_core import (DEFAULT_DECODE_BUDGET, DISPLAY_THUMB_EDGE, FILMSTRIP_THUMB_EDGE,
+                        get_thumbnail_cache, is_image_file, is_very_large, make_thumbnail,
+                        set_decode_budget, thumbnail_key)
+
+
+def iter_images(roots):
+    """递归列出所有支持的图片"""
+    for root in roots:
+        if os.path.isfile(root):
+            if is_image_file(root):
+                yield os.path.abspath(root)
+            continue
+        for folder, _, names in os.walk(root):
+            for name in names:
+                if is_image_file(name):
+                    yield os.path.abspath(os.path.join(folder, name))
+
+
+# 查看器设置中缓存大小的默认值（MB），与 SettingsManager 一致
+DEFAULT_CACHE_SIZE = 512
+
+
+def saved_decode_budget():
+    """查看器设置中的解码预算（MB）；哪些图像需要显示用缩略图由它决定"""
+    settings = QSettings("InfiniteSight", "Settings")
+    return settings.value("performance/decode_budget", DEFAULT_DECODE_BUDGET >> 20, type=int)
+
+
+def saved_cache_size():
+    """查看器设置中的缓存大小（MB）；查看器启动时会把缩略图缓存淘汰到这个大小"""
+    settings = QSettings("InfiniteSight", "Settings")
+    return settings.value("performance/cache_size", DEFAULT_CACHE_SIZE, type=int)
+
+
+def thumbnail_edges(file_path):
+    """与查看器一致：所有图片都有缩略图条尺寸，超大图像另有显示用缩略图"""
+    edges = [FILMSTRIP_THUMB_EDGE]
+    if is_very_large(file_path):
+        edges.append(DISPLAY_THUMB_EDGE)
+    return edges
+
+
+def _init_worker(decode_budget):
+    # 每张图只处理一次，不需要 libvips 的操作缓存
+    pyvips.cache_set_max(0)
+    set_decode_budget(decode_budget)
+
+
+def warm_one(file_path):
+    """在子进程中执行，生成的缩略图直接写入缓存数据库
+
+    返回 (路径, 写入字节数, 是否全部已缓存, 错误信息)；吞吐量按源文件字节统计
+    """
+    written = 0
+    cache = get_thumbnail_cache()
+    try:
+        skipped = True
+        for edge in thumbnail_edges(file_path):
+            key = thumbnail_key(file_path, edge)
+            if cache.contains(key):
+                continue
+            skipped = False
+            written += cache.put(key, make_thumbnail(file_path, edge))
+        return file_path, written, skipped, None
+    except Exception as e:
+        return file_path, written, False, str(e)
+
+
+def _format_rate(count, nbytes, elapsed):
+    elapsed = max(elapsed, 1e-6)
+    return f"{count / elapsed:.1f} files/s, {nbytes / elapsed / (1 << 20):.1f} MB/s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="预先生成 InfiniteSight 缩略图缓存")
+    parser.add_argument("paths", nargs="+", help="要遍历的目录或文件")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="工作进程数")
+    parser.add_argument("--decode-budget", type=int, default=None, metavar="MB",
+                        help="解码预算，默认取查看器设置中的值")
+    parser.add_argument("--cache-size", type=int, default=None, metavar="MB",
+                        help="缓存大小上限，写满后停止，默认取查看器设置中的值")
+    parser.add_argument("--quiet", action="store_true", help="不显示逐行进度")
+    args = parser.parse_args(argv)
+    decode_budget = (args.decode_budget if args.decode_budget is not None else saved_decode_budget()) << 20
+    cache_size = (args.cache_size if args.cache_size is not None else saved_cache_size()) << 20
+
+    print("Scanning...", file=sys.stderr)
+    files = list(iter_images(args.paths))
+    total = len(files)
+    cache = get_thumbnail_cache()
+    print(f"{total} images, cache: {cache.db_path}", file=sys.stderr)
+
+    done = skipped = failed = 0
+    source_bytes = warmed_bytes = 0
+    full = False
+    start = time.perf_counter()
+    pool = multiprocessing.Pool(max(1, args.jobs), initializer=_init_worker, initargs=(decode_budget,))
+    try:
+        for file_path, written, was_cached, error in pool.imap_unordered(warm_one, files, chunksize=4):
+            done += 1
+            if was_cached:
+                skipped += 1
+            elif written:
+                source_bytes += os.path.getsize(file_path)
+                warmed_bytes += written
+            if error:
+                failed += 1
+                print(f"\nFailed: {file_path}: {error}", file=sys.stderr)
+            if not args.quiet:
+                rate = _format_rate(done - skipped, source_bytes, time.perf_counter() - start)
+                print(f"\r[{done}/{total}] skipped {skipped}, failed {failed}, {rate}",
+                      end="", file=sys.stderr, flush=True)
+            if warmed_bytes >= cache_size:
+                # 再写下去查看器启动时也会淘汰掉
+                full = True
+                pool.terminate()
+                break
+        else:
+            pool.close()
+    except KeyboardInterrupt:
+        # 已写入的缩略图都已提交，下次运行时跳过
+        pool.terminate()
+        print("\nInterrupted", file=sys.stderr)
+    finally:
+        pool.join()
+        # 按查看器的上限淘汰最久未用的条目（本次写入的最新），查看器启动时无需再淘汰
+        cache.set_max_bytes(cache_size)
+        cache.compact()
+
+    elapsed = time.perf_counter() - start
+    if full:
+        print(f"\nCache size limit reached ({cache_size >> 20} MB), {total - done} images not warmed; "
+              f"raise the cache size in Settings > Performance or pass --cache-size", file=sys.stderr)
+    print(f"\nDone: {done - skipped - failed} generated, {skipped} already cached, {failed} failed "
+          f"in {elapsed:.1f}s ({_format_rate(done - skipped, source_bytes, elapsed)})", file=sys.stderr)
+    print(f"Cache size: {cache.total_bytes / (1 << 20):.1f} MB of {cache_size >> 20} MB", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())